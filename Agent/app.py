@@ -1,12 +1,16 @@
+import asyncio
+import json
 import logging
+import time
 from contextlib import asynccontextmanager
 import httpx
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 import traceback
-import config, schemas
-from modules import embedding, scoring
-from modules.generation import create_full_resume
+import config, llm_client, schemas
+from modules import embedding, prompt_budget, scoring
+from modules.generation import create_full_resume, stream_full_resume
 from llm_client import LLMError
 from resume_agent import create_resume_agent
 
@@ -15,19 +19,46 @@ logger = logging.getLogger(__name__)
 
 app_state = {}
 
+async def _timed_step(name: str, fn, timings: dict):
+    started = time.perf_counter()
+    await asyncio.to_thread(fn)
+    timings[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+async def warm_up_service():
+    """Connect to MongoDB, resolve tokenizer data, load and warm the model, then mark the service ready."""
+    timings = app_state["startup_ms"] = {}
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(
+            _timed_step("mongo", embedding.init_db, timings),
+            _timed_step("tokenizer", embedding.ensure_tokenizer_data, timings),
+            _timed_step("model_load", embedding.load_model, timings),
+        )
+        await _timed_step("warmup", embedding.warmup, timings)
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Startup complete. Service is ready. Breakdown: {timings}")
+    except Exception as e:
+        app_state["startup_error"] = str(e)
+        logger.error(f"Startup failed: {e}", exc_info=True)
+    finally:
+        app_state["ready_event"].set()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info(f"Starting up {config.APP_NAME} v{config.APP_VERSION}...")
-    app_state["http_client"] = httpx.AsyncClient(timeout=60.0)
+    logger.info(f"Starting up {config.APP_NAME} v{config.APP_VERSION} ({config.STARTUP_MODE} startup)...")
+    app_state["ready_event"] = asyncio.Event()
+    app_state["http_client"] = llm_client.get_http_client()
     app_state["resume_agent"] = create_resume_agent(app_state["http_client"])
-    embedding.init_db()
-    embedding.load_model()
-    logger.info("Startup complete. Service is ready.")
+    if config.STARTUP_MODE == "blocking":
+        await warm_up_service()
+    else:
+        app_state["startup_task"] = asyncio.create_task(warm_up_service())
     yield
     logger.info("Shutting down...")
-    await app_state["http_client"].aclose()
-    if embedding.state.mongo_client:
-        embedding.state.mongo_client.close()
+    if not app_state["ready_event"].is_set():
+        app_state["startup_task"].cancel()
+    await llm_client.close_http_client()
+    embedding.shutdown()
     logger.info("Shutdown complete.")
 
 app = FastAPI(
@@ -37,6 +68,17 @@ app = FastAPI(
 )
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
+async def require_ready():
+    """Hold requests that need the model or database until warmup finishes (up to READY_WAIT_TIMEOUT)."""
+    ready_event = app_state["ready_event"]
+    if not ready_event.is_set():
+        try:
+            await asyncio.wait_for(ready_event.wait(), timeout=config.READY_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Service is still starting up. Please retry shortly.")
+    if app_state.get("startup_error"):
+        raise HTTPException(status_code=503, detail=f"Service failed to start: {app_state['startup_error']}")
+
 def get_http_client() -> httpx.AsyncClient:
     return app_state["http_client"]
 
@@ -49,18 +91,41 @@ async def health_check():
     """Health check endpoint to verify service status."""
     return {"status": "healthy", "service": config.APP_NAME}
 
-@app.post("/index/profile/{user_id}", response_model=schemas.IndexProfileResponse, tags=["Indexing"])
+@app.get("/ready", response_model=schemas.ReadinessResponse, tags=["Utilities"])
+async def readiness_check():
+    """Readiness probe: 200 once the model is loaded and warmed up, 503 before that or if startup failed."""
+    if not app_state["ready_event"].is_set():
+        return JSONResponse(status_code=503, content={"status": "starting", "startup_ms": app_state.get("startup_ms", {})})
+    if app_state.get("startup_error"):
+        return JSONResponse(status_code=503, content={
+            "status": "failed", "startup_ms": app_state["startup_ms"], "error": app_state["startup_error"]
+        })
+    return {"status": "ready", "startup_ms": app_state["startup_ms"]}
+
+@app.get("/metrics", tags=["Utilities"])
+async def metrics():
+    """Runtime counters for the embedding batcher and caches."""
+    return {"embedding": embedding.get_stats(), "scoring": scoring.get_stats(), "llm": await llm_client.get_stats(), "prompts": prompt_budget.get_stats()}
+
+@app.post("/index/profile/{user_id}", response_model=schemas.IndexProfileResponse, tags=["Indexing"], dependencies=[Depends(require_ready)])
 async def index_user_profile(user_id: str):
     """Index a user's profile data for vector search and retrieval."""
     try:
-        total_chunks = embedding.index_user_profile(user_id)
-        return {"status": "success", "message": f"Profile indexed successfully into {total_chunks} chunks."}
+        result = await embedding.index_user_profile_async(user_id)
+        return {
+            "status": "success",
+            "message": (
+                f"Profile indexed successfully into {result['total_chunks']} chunks "
+                f"({result['kept']} kept, {result['added']} added, {result['updated']} updated, {result['removed']} removed)."
+            ),
+            **result,
+        }
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error during indexing: {e}")
 
-@app.post("/generate/full", response_model=schemas.GenerateResponse, tags=["Generation"])
+@app.post("/generate/full", response_model=schemas.GenerateResponse, tags=["Generation"], dependencies=[Depends(require_ready)])
 async def generate_full_resume(
     request: schemas.FullGenerateRequest,
     client: httpx.AsyncClient = Depends(get_http_client)
@@ -76,7 +141,24 @@ async def generate_full_resume(
         logger.error(f"Unexpected error in full generation: {e}\n{tb_str}")
         raise HTTPException(status_code=500, detail="An unexpected internal error occurred.")
 
-@app.post("/score", response_model=schemas.ScoreResponse, tags=["Scoring"])
+@app.post("/generate/full/stream", tags=["Generation"], dependencies=[Depends(require_ready)])
+async def generate_full_resume_stream(
+    request: schemas.FullGenerateRequest,
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
+    """Server-sent events: ``token`` fragments as Gemini produces them, a ``section`` event with the
+    parsed JSON of each resume section as soon as it closes, then ``done`` (or ``error``)."""
+    async def stream():
+        try:
+            async for event, data in stream_full_resume(request, client):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming full generation failed: {e}", exc_info=True)
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/score", response_model=schemas.ScoreResponse, tags=["Scoring"], dependencies=[Depends(require_ready)])
 async def score_resume(
     request: schemas.ScoreRequest,
     client: httpx.AsyncClient = Depends(get_http_client)
@@ -88,6 +170,21 @@ async def score_resume(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
 
+@app.post("/score/batch", tags=["Scoring"], dependencies=[Depends(require_ready)])
+async def score_batch(
+    request: schemas.BatchScoreRequest,
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
+    """Score one JD against many resumes (or one resume against many JDs), streamed as NDJSON."""
+    async def stream():
+        try:
+            async for result in scoring.score_batch(request, client):
+                yield result.model_dump_json(exclude={"debug"}) + "\n"
+        except Exception as e:
+            logger.error(f"Batch scoring failed: {e}", exc_info=True)
+            yield json.dumps({"error": f"Batch scoring failed: {e}"}) + "\n"
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @app.post("/suggest", response_model=schemas.SuggestionResponse, tags=["Scoring"])
 async def get_suggestions(
     request: schemas.SuggestionRequest,
@@ -98,7 +195,7 @@ async def get_suggestions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
 
-@app.post("/agent/chat", response_model=schemas.AgentChatResponse, tags=["Agent"])
+@app.post("/agent/chat", response_model=schemas.AgentChatResponse, tags=["Agent"], dependencies=[Depends(require_ready)])
 async def agent_chat(
     request: schemas.AgentChatRequest,
     agent=Depends(get_resume_agent)
@@ -6,17 +6,108 @@ load_dotenv(override=True)
 APP_NAME = "CVisionary Unified Service"
 APP_VERSION = "2.0.0"
 
+# Validated when the database is first used (embedding.init_db), not at import time.
 MONGO_URI = os.getenv("MONGO_URI")
-if not MONGO_URI:
-    raise ValueError("MONGO_URI environment variable not set.")
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "test")
 
-print(f"[CONFIG] FastAPI using DB: {MONGO_DB_NAME} at {MONGO_URI}")
+# "background" binds the port immediately and loads/warms the model in a background task;
+# "blocking" finishes warmup before the app accepts traffic.
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background")
+READY_WAIT_TIMEOUT = float(os.getenv("READY_WAIT_TIMEOUT", "30"))
 
 MODEL_NAME = "anass1209/resume-job-matcher-all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_model")
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "model_int8.onnx")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+# Sentence segmentation for chunking: "rule" (fast regex splitter) or "nltk" (punkt)
+CHUNK_SEGMENTER = os.getenv("CHUNK_SEGMENTER", "rule")
+# "document" embeds each whole text once; "chunked" scores a chunk x chunk similarity matrix
+SEMANTIC_SCORING_MODE = os.getenv("SEMANTIC_SCORING_MODE", "document")
+SEMANTIC_AGGREGATION = os.getenv("SEMANTIC_AGGREGATION", "max_mean")
+SEMANTIC_TOP_K = int(os.getenv("SEMANTIC_TOP_K", "3"))
+SEMANTIC_CHUNK_WORDS = int(os.getenv("SEMANTIC_CHUNK_WORDS", "120"))
+SEMANTIC_MAX_CHUNKS = int(os.getenv("SEMANTIC_MAX_CHUNKS", "64"))
+SEMANTIC_REFERENCE_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_REFERENCE_CACHE_MAX_ENTRIES", "256"))
+# /score/batch: pairs scored (and embedded) per streamed block, and the request size limit
+BATCH_SCORE_BLOCK_SIZE = int(os.getenv("BATCH_SCORE_BLOCK_SIZE", "64"))
+BATCH_SCORE_MAX_PAIRS = int(os.getenv("BATCH_SCORE_MAX_PAIRS", "10000"))
+EMBED_BATCH_ENABLED = os.getenv("EMBED_BATCH_ENABLED", "true").lower() == "true"
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "2"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "10000"))
+EMBED_CACHE_DISK_PATH = os.getenv("EMBED_CACHE_DISK_PATH", "")
+EMBED_CACHE_DISK_MAX_ROWS = int(os.getenv("EMBED_CACHE_DISK_MAX_ROWS", "200000"))
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "atlas")
+VECTOR_INDEX_NAME = os.getenv("VECTOR_INDEX_NAME", "vector_index")
+LOCAL_INDEX_MAX_USERS = int(os.getenv("LOCAL_INDEX_MAX_USERS", "1000"))
+EMBEDDING_STORAGE_FORMAT = os.getenv("EMBEDDING_STORAGE_FORMAT", "array")
+DB_EXECUTOR_MAX_WORKERS = int(os.getenv("DB_EXECUTOR_MAX_WORKERS", "16"))
+INFERENCE_MAX_WORKERS = int(os.getenv("INFERENCE_MAX_WORKERS", "2"))
+INFERENCE_TORCH_THREADS = int(os.getenv("INFERENCE_TORCH_THREADS", "0"))
+# Embedding worker processes (0 keeps the model in the API process) and threads per worker
+EMBEDDING_POOL_WORKERS = int(os.getenv("EMBEDDING_POOL_WORKERS", "0"))
+EMBEDDING_POOL_THREADS_PER_WORKER = int(os.getenv("EMBEDDING_POOL_THREADS_PER_WORKER", "1"))
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 GENERATION_TEMPERATURE = float(os.getenv("GENERATION_TEMPERATURE", "0.7"))
-GENERATION_MAX_TOKENS = int(os.getenv("GENERATION_MAX_TOKENS", "2048"))
\ No newline at end of file
+GENERATION_MAX_TOKENS = int(os.getenv("GENERATION_MAX_TOKENS", "2048"))
+# Point at a local mock/stand-in server for tests and load tests
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+
+# Prompt token budget per Gemini call (0 disables trimming); the JD gets at most its own share,
+# and retrieved chunks at least this cosine-similar to a higher-ranked one are dropped (1 disables)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PROMPT_JD_TOKEN_BUDGET = int(os.getenv("PROMPT_JD_TOKEN_BUDGET", "1500"))
+PROMPT_DEDUPE_SIMILARITY = float(os.getenv("PROMPT_DEDUPE_SIMILARITY", "0.92"))
+
+# Gemini call protection: concurrency cap (0 disables), token-bucket rate limit in requests
+# per minute (0 disables), jittered exponential retry on 429/5xx, and a circuit breaker.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+LLM_RATE_LIMIT_RPM = float(os.getenv("LLM_RATE_LIMIT_RPM", "0"))
+LLM_RATE_LIMIT_BURST = float(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+# Shared Gemini HTTP client: HTTP/2 (needs the h2 package), connection pool and keep-alive limits
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+# Concurrent identical (model, prompt, generation config) calls share one upstream request
+LLM_COALESCE_ENABLED = os.getenv("LLM_COALESCE_ENABLED", "true").lower() == "true"
+# Opt-in SQLite cache of Gemini responses, used only by the call sites listed in LLM_CACHE_NAMESPACES
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_NAMESPACES = {name.strip() for name in os.getenv("LLM_CACHE_NAMESPACES", "keywords,suggestions").split(",") if name.strip()}
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm_responses.sqlite3")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "604800"))
+
+# "llm" asks Gemini for the JD's skills; "local" uses the bundled lexicon extractor (no network)
+KEYWORD_EXTRACTOR = os.getenv("KEYWORD_EXTRACTOR", "llm")
+KEYWORD_LLM_FALLBACK = os.getenv("KEYWORD_LLM_FALLBACK", "local")
+LOCAL_KEYWORD_RANKING = os.getenv("LOCAL_KEYWORD_RANKING", "tfidf")
+LOCAL_KEYWORD_MAX = int(os.getenv("LOCAL_KEYWORD_MAX", "15"))
+
+# Missing-keyword-set -> suggestions cache. "cached" profile suggestions reuse the generic
+# suggestions and personalize them locally; "llm" sends a profile-specific prompt every time.
+SUGGESTION_CACHE_ENABLED = os.getenv("SUGGESTION_CACHE_ENABLED", "true").lower() == "true"
+SUGGESTION_CACHE_MAX_ENTRIES = int(os.getenv("SUGGESTION_CACHE_MAX_ENTRIES", "2048"))
+SUGGESTION_CACHE_TTL_SECONDS = float(os.getenv("SUGGESTION_CACHE_TTL_SECONDS", "86400"))
+PROFILE_SUGGESTION_MODE = os.getenv("PROFILE_SUGGESTION_MODE", "cached")
+SUGGESTION_PERSONALIZATION_MIN_SIMILARITY = float(os.getenv("SUGGESTION_PERSONALIZATION_MIN_SIMILARITY", "0.7"))
+
+# JD -> extracted skills cache; the persistent tier stores entries in MongoDB with a TTL index
+KEYWORD_CACHE_ENABLED = os.getenv("KEYWORD_CACHE_ENABLED", "true").lower() == "true"
+KEYWORD_CACHE_MAX_ENTRIES = int(os.getenv("KEYWORD_CACHE_MAX_ENTRIES", "2048"))
+KEYWORD_CACHE_TTL_SECONDS = float(os.getenv("KEYWORD_CACHE_TTL_SECONDS", "86400"))
+KEYWORD_CACHE_PERSISTENT = os.getenv("KEYWORD_CACHE_PERSISTENT", "false").lower() == "true"
+KEYWORD_CACHE_COLLECTION = os.getenv("KEYWORD_CACHE_COLLECTION", "keyword_cache")
\ No newline at end of file
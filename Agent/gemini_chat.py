@@ -0,0 +1,136 @@
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import ConfigDict, Field
+import config
+import llm_client
+
+logger = logging.getLogger(__name__)
+
+# JSON-schema keys Gemini's function-declaration schema understands; the rest (title, default, ...) are dropped.
+_SCHEMA_KEYS = {"type", "description", "properties", "items", "required", "enum", "format", "nullable"}
+
+def _gemini_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a pydantic JSON schema to the OpenAPI subset accepted in function declarations."""
+    options = schema.get("anyOf")
+    if options:
+        non_null = [option for option in options if option.get("type") != "null"]
+        merged = {**schema, **(non_null[0] if non_null else {"type": "string"})}
+        merged.pop("anyOf")
+        if len(non_null) < len(options):
+            merged["nullable"] = True
+        schema = merged
+    result = {key: value for key, value in schema.items() if key in _SCHEMA_KEYS}
+    if "properties" in result:
+        result["properties"] = {name: _gemini_schema(prop) for name, prop in result["properties"].items()}
+    if "items" in result:
+        result["items"] = _gemini_schema(result["items"])
+    return result
+
+def _function_declaration(tool: Any) -> Dict[str, Any]:
+    function = convert_to_openai_tool(tool)["function"]
+    declaration = {"name": function["name"], "description": function.get("description", "")}
+    parameters = function.get("parameters")
+    if parameters and parameters.get("properties"):
+        declaration["parameters"] = _gemini_schema(parameters)
+    return declaration
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+
+def _to_gemini_contents(messages: Sequence[BaseMessage]) -> Dict[str, Any]:
+    """Map LangChain messages to Gemini ``contents`` (plus ``systemInstruction``), merging consecutive turns of one role."""
+    system_parts, contents = [], []
+    tool_names: Dict[str, str] = {}
+    for message in messages:
+        if isinstance(message, SystemMessage):
+            system_parts.append({"text": _text(message.content)})
+            continue
+        if isinstance(message, AIMessage):
+            role, parts = "model", []
+            if _text(message.content):
+                parts.append({"text": _text(message.content)})
+            for call in message.tool_calls:
+                tool_names[call["id"]] = call["name"]
+                parts.append({"functionCall": {"name": call["name"], "args": call["args"]}})
+        elif isinstance(message, ToolMessage):
+            role = "user"
+            name = message.name or tool_names.get(message.tool_call_id, "tool")
+            parts = [{"functionResponse": {"name": name, "response": {"result": _text(message.content)}}}]
+        else:
+            role, parts = "user", [{"text": _text(message.content)}]
+        if not parts:
+            continue
+        if contents and contents[-1]["role"] == role:
+            contents[-1]["parts"].extend(parts)
+        else:
+            contents.append({"role": role, "parts": parts})
+    request: Dict[str, Any] = {"contents": contents}
+    if system_parts:
+        request["systemInstruction"] = {"parts": system_parts}
+    return request
+
+class GeminiChatModel(BaseChatModel):
+    """LangChain chat model over the Gemini REST API with tool calling.
+
+    Requests go through ``llm_client.post_gemini`` on the shared HTTP client, so the agent
+    gets the same connection pool, concurrency cap, rate limit, retries and circuit breaker
+    as every other Gemini call. Async only: the synchronous entry points raise.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    http_client: httpx.AsyncClient = Field(exclude=True)
+    model: str = Field(default_factory=lambda: config.GEMINI_MODEL)
+    temperature: float = Field(default_factory=lambda: config.GENERATION_TEMPERATURE)
+    max_output_tokens: int = Field(default_factory=lambda: config.GENERATION_MAX_TOKENS)
+
+    @property
+    def _llm_type(self) -> str:
+        return "gemini-rest"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "temperature": self.temperature, "max_output_tokens": self.max_output_tokens}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(function_declarations=[_function_declaration(tool) for tool in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        raise llm_client.LLMError("GeminiChatModel is async-only; use ainvoke/astream from the event loop.")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         function_declarations: Optional[List[Dict[str, Any]]] = None, **kwargs: Any) -> ChatResult:
+        if not config.GEMINI_API_KEY:
+            raise llm_client.LLMError("GEMINI_API_KEY environment variable is not set")
+        payload = _to_gemini_contents(messages)
+        payload["generationConfig"] = {"temperature": self.temperature, "maxOutputTokens": self.max_output_tokens}
+        if stop:
+            payload["generationConfig"]["stopSequences"] = stop
+        if function_declarations:
+            payload["tools"] = [{"functionDeclarations": function_declarations}]
+        url = f"{config.GEMINI_API_BASE_URL}/models/{self.model}:generateContent?key={config.GEMINI_API_KEY}"
+        response_data = await llm_client.post_gemini(self.http_client, url, payload)
+        try:
+            parts = response_data["candidates"][0]["content"].get("parts", [])
+        except (KeyError, IndexError) as e:
+            error_msg = f"Failed to parse Gemini response: {e}. Response: {response_data}"
+            logger.error(error_msg)
+            raise llm_client.LLMError(error_msg) from e
+        text = "".join(part.get("text", "") for part in parts)
+        tool_calls = [
+            {"name": part["functionCall"]["name"], "args": part["functionCall"].get("args") or {}, "id": f"call_{uuid.uuid4().hex}"}
+            for part in parts if "functionCall" in part
+        ]
+        usage = response_data.get("usageMetadata", {})
+        message = AIMessage(content=text, tool_calls=tool_calls, response_metadata={"model": self.model, "usage": usage})
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -1,51 +1,434 @@
+import asyncio
+import hashlib
 import logging
+import random
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
 import httpx
 import json
 import config
+from modules.llm_cache import LLMResponseCache, response_key
 
 logger = logging.getLogger(__name__)
 
 class LLMError(Exception):
     pass
 
-async def invoke_gemini(client: httpx.AsyncClient, prompt: str, enforce_json: bool = True) -> str:
-    if not config.GEMINI_API_KEY:
-        raise LLMError("GEMINI_API_KEY environment variable is not set")
+class LLMCircuitOpenError(LLMError):
+    """Raised without contacting Gemini while the circuit breaker is open."""
+    pass
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``."""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and rejects calls for ``reset_timeout``
+    seconds; then lets a single probe through (half-open) and closes again if it succeeds."""
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probe_in_flight = False
+
+    def check(self) -> bool:
+        """Raise while open; returns True when this call is the half-open probe."""
+        if self.failure_threshold <= 0 or self.state == "closed":
+            return False
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probe_in_flight = False
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        raise LLMCircuitOpenError(
+            f"Gemini circuit breaker is open after {self.failures} consecutive failures; failing fast."
+        )
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """Let another call probe when the current one ended without reaching Gemini."""
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failure_threshold > 0 and (self.state == "half_open" or self.failures >= self.failure_threshold):
+            if self.state != "open":
+                self.opens += 1
+                logger.warning(f"Opening Gemini circuit breaker after {self.failures} consecutive failures.")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+class LLMGuard:
+    """Process-wide protection for Gemini calls: concurrency cap, rate limit, retries, breaker and counters."""
+    def __init__(self):
+        self.semaphore = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY) if config.LLM_MAX_CONCURRENCY > 0 else None
+        rate = config.LLM_RATE_LIMIT_RPM / 60.0
+        self.bucket = TokenBucket(rate, config.LLM_RATE_LIMIT_BURST) if rate > 0 else None
+        self.breaker = CircuitBreaker(config.LLM_CIRCUIT_FAILURE_THRESHOLD, config.LLM_CIRCUIT_RESET_SECONDS)
+        self.in_flight = 0
+        self.counters = {
+            "requests": 0, "attempts": 0, "successes": 0, "failures": 0, "retries": 0,
+            "status_429": 0, "status_5xx": 0, "transport_errors": 0,
+            "circuit_rejections": 0, "queue_timeouts": 0, "throttled": 0, "coalesced": 0,
+        }
+        self.throttle_wait_s = 0.0
+        self.max_in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self.semaphore is not None:
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout=config.LLM_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.counters["queue_timeouts"] += 1
+                self.counters["failures"] += 1
+                raise LLMError(f"Timed out after {config.LLM_QUEUE_TIMEOUT}s waiting for a free Gemini request slot.")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            if self.semaphore is not None:
+                self.semaphore.release()
+
+    async def throttle(self):
+        if self.bucket is None:
+            return
+        waited = await self.bucket.acquire()
+        if waited:
+            self.counters["throttled"] += 1
+            self.throttle_wait_s += waited
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "throttle_wait_ms": round(self.throttle_wait_s * 1000, 1),
+            "circuit_state": self.breaker.state,
+            "circuit_opens": self.breaker.opens,
+            "single_flight_keys": len(_in_flight),
+        }
+
+_guard: Optional[LLMGuard] = None
+_http_client: Optional[httpx.AsyncClient] = None
+# Single-flight table: request key -> the task every concurrent identical caller awaits.
+_in_flight: Dict[str, "asyncio.Task[Any]"] = {}
+
+def get_guard() -> LLMGuard:
+    global _guard
+    if _guard is None:
+        _guard = LLMGuard()
+    return _guard
+
+def create_http_client() -> httpx.AsyncClient:
+    """Async client tuned for Gemini: HTTP/2 when the h2 package is installed, pooled keep-alive connections."""
+    http2 = config.LLM_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("LLM_HTTP2 is enabled but the 'h2' package is missing (pip install 'httpx[http2]'); using HTTP/1.1.")
+            http2 = False
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(config.LLM_REQUEST_TIMEOUT, connect=config.LLM_CONNECT_TIMEOUT),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """The process-wide client every Gemini call shares."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def reset_guard():
+    """Drop the guard (and its counters) and the single-flight table; the next call builds a
+    guard from current config. Shared tasks belong to the loop that created them, so none may
+    be awaited from a new loop."""
+    global _guard
+    _guard = None
+    _in_flight.clear()
+
+_response_cache: Optional[LLMResponseCache] = None
+
+def get_response_cache(namespace: Optional[str]) -> Optional[LLMResponseCache]:
+    """The shared response cache if caching is enabled for the ``namespace`` call site."""
+    global _response_cache
+    if not config.LLM_CACHE_ENABLED or namespace not in config.LLM_CACHE_NAMESPACES:
+        return None
+    if _response_cache is None:
+        _response_cache = LLMResponseCache(config.LLM_CACHE_PATH, config.LLM_CACHE_MAX_BYTES, config.LLM_CACHE_TTL_SECONDS)
+    return _response_cache
+
+async def get_stats() -> Dict[str, Any]:
+    return {**get_guard().stats(), "response_cache": await _response_cache_stats()}
+
+async def _response_cache_stats() -> Optional[Dict[str, Any]]:
+    """Response cache stats read off the event loop; a locked or damaged file reports unavailable."""
+    if _response_cache is None:
+        return None
+    try:
+        return await asyncio.to_thread(_response_cache.stats)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM response cache stats unavailable: {e}")
+        return {"available": False, "error": str(e)}
+
+def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), config.LLM_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    # Full jitter: a uniform draw up to the exponential ceiling spreads retries from many workers.
+    return random.uniform(0, min(config.LLM_RETRY_MAX_DELAY, config.LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+def _error_message(e: Exception) -> str:
+    error_msg = f"Gemini API request failed: {e}"
+    try:
+        error_detail = e.response.json()
+        error_msg += f" | Details: {error_detail}"
+    except: pass
+    return error_msg
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{config.GEMINI_MODEL}:generateContent?key={config.GEMINI_API_KEY}"
+@asynccontextmanager
+async def gemini_response(client: httpx.AsyncClient, url: str, payload: Dict[str, Any], stream: bool = False):
+    """Open a Gemini POST through the guard and yield the successful response.
 
+    Retries 429/5xx responses and transport errors with jittered exponential backoff
+    (honouring ``Retry-After``); other HTTP errors fail immediately. With ``stream=True`` the
+    body is left unread and the request keeps its concurrency slot until the block exits;
+    retries only happen before the response starts.
+    """
+    guard = get_guard()
+    guard.counters["requests"] += 1
+    headers = {"Content-Type": "application/json"}
+    last_error: Optional[Exception] = None
+    for attempt in range(config.LLM_MAX_RETRIES + 1):
+        try:
+            probe = guard.breaker.check()
+        except LLMCircuitOpenError:
+            guard.counters["circuit_rejections"] += 1
+            guard.counters["failures"] += 1
+            raise
+        # A half-open probe must end in record_success/record_failure or give its turn back;
+        # otherwise (queue timeout, cancellation, unexpected error) the breaker would stay stuck.
+        recorded = False
+        try:
+            await guard.throttle()
+            retry_after = None
+            async with guard.slot():
+                guard.counters["attempts"] += 1
+                response = None
+                try:
+                    request = client.build_request("POST", url, json=payload, headers=headers,
+                                                   timeout=httpx.Timeout(config.LLM_REQUEST_TIMEOUT, connect=config.LLM_CONNECT_TIMEOUT))
+                    response = await client.send(request, stream=stream)
+                    if response.is_error:
+                        await response.aread()
+                        response.raise_for_status()
+                except httpx.HTTPStatusError as e:
+                    await response.aclose()
+                    status = e.response.status_code
+                    if status not in RETRYABLE_STATUS_CODES:
+                        # A 400/403 says nothing about upstream health: neither close the breaker
+                        # nor reset the failure streak, just hand the probe turn back.
+                        guard.breaker.release_probe()
+                        recorded = True
+                        guard.counters["failures"] += 1
+                        error_msg = _error_message(e)
+                        logger.error(error_msg)
+                        raise LLMError(error_msg) from e
+                    guard.counters["status_429" if status == 429 else "status_5xx"] += 1
+                    retry_after = e.response.headers.get("Retry-After")
+                    last_error, failure = e, f"HTTP {status}"
+                except httpx.RequestError as e:
+                    if response is not None:
+                        await response.aclose()
+                    guard.counters["transport_errors"] += 1
+                    last_error, failure = e, type(e).__name__
+                else:
+                    guard.breaker.record_success()
+                    recorded = True
+                    guard.counters["successes"] += 1
+                    try:
+                        yield response
+                    finally:
+                        await response.aclose()
+                    return
+            guard.breaker.record_failure()
+            recorded = True
+        finally:
+            if probe and not recorded:
+                guard.breaker.release_probe()
+        if attempt < config.LLM_MAX_RETRIES:
+            delay = _retry_delay(attempt, retry_after)
+            guard.counters["retries"] += 1
+            logger.warning(f"Gemini attempt {attempt + 1} failed ({failure}); retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+    guard.counters["failures"] += 1
+    error_msg = _error_message(last_error)
+    logger.error(error_msg)
+    raise LLMError(error_msg) from last_error
+
+async def post_gemini(client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST to Gemini through the guard and return the decoded JSON body."""
+    async with gemini_response(client, url, payload) as response:
+        return response.json()
+
+async def _single_flight(key: str, call):
+    """Run ``call()`` once per key among concurrent callers; all of them get its result or error.
+
+    The shared task is shielded, so a caller that is cancelled (e.g. a disconnected client)
+    does not cancel the upstream request the others are waiting for.
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(call())
+        _in_flight[key] = task
+
+        def _release(done: "asyncio.Task[Any]"):
+            if _in_flight.get(key) is done:
+                del _in_flight[key]
+            if not done.cancelled():
+                done.exception()  # Mark as retrieved when every caller has gone away.
+        task.add_done_callback(_release)
+    else:
+        get_guard().counters["coalesced"] += 1
+    return await asyncio.shield(task)
+
+def _generation_payload(prompt: str, enforce_json: bool, temperature: Optional[float] = None) -> Dict[str, Any]:
     payload = {
         "contents": [{"parts": [{"text": prompt}]}],
         "generationConfig": {
-            "temperature": config.GENERATION_TEMPERATURE,
+            "temperature": config.GENERATION_TEMPERATURE if temperature is None else temperature,
             "maxOutputTokens": config.GENERATION_MAX_TOKENS,
         },
     }
     if enforce_json:
         payload["generationConfig"]["responseMimeType"] = "application/json"
+    return payload
 
-    headers = {"Content-Type": "application/json"}
-    logger.info(f"Invoking Gemini API with model {config.GEMINI_MODEL}")
-
+def _cacheable(text: str, enforce_json: bool) -> bool:
+    """Never persist an empty answer or, for JSON prompts, one that does not parse."""
+    if not text:
+        return False
+    if not enforce_json:
+        return True
     try:
-        response = await client.post(url, json=payload, headers=headers, timeout=60.0)
-        response.raise_for_status()
-        response_data = response.json()
+        json.loads(text)
+        return True
+    except json.JSONDecodeError:
+        return False
 
-        generated_text = response_data["candidates"][0]["content"]["parts"][0]["text"]
-        logger.info("Successfully generated content from Gemini API")
-        return generated_text.strip()
+async def invoke_gemini(client: httpx.AsyncClient, prompt: str, enforce_json: bool = True,
+                        cache_namespace: Optional[str] = None, temperature: Optional[float] = None) -> str:
+    """Generate text for ``prompt``. ``cache_namespace`` names the call site; responses are
+    served from and stored in the persistent response cache when it is enabled for it.
+    ``temperature`` overrides GENERATION_TEMPERATURE for this call."""
+    if not config.GEMINI_API_KEY:
+        raise LLMError("GEMINI_API_KEY environment variable is not set")
 
-    except (httpx.HTTPStatusError, httpx.RequestError) as e:
-        error_msg = f"Gemini API request failed: {e}"
-        try:
-            error_detail = e.response.json()
-            error_msg += f" | Details: {error_detail}"
-        except: pass
-        logger.error(error_msg)
-        raise LLMError(error_msg) from e
+    url = f"{config.GEMINI_API_BASE_URL}/models/{config.GEMINI_MODEL}:generateContent?key={config.GEMINI_API_KEY}"
+    payload = _generation_payload(prompt, enforce_json, temperature)
+
+    cache = get_response_cache(cache_namespace)
+    if cache is not None:
+        generation_config = payload["generationConfig"]
+        cache_key = response_key(config.GEMINI_MODEL, prompt, generation_config["temperature"],
+                                 generation_config.get("responseMimeType"), generation_config["maxOutputTokens"])
+        cached = await asyncio.to_thread(cache.get, cache_namespace, cache_key)
+        if cached is not None:
+            logger.info(f"Serving Gemini response for '{cache_namespace}' from the response cache")
+            return cached
+
+    logger.info(f"Invoking Gemini API with model {config.GEMINI_MODEL}")
 
+    if config.LLM_COALESCE_ENABLED:
+        key = hashlib.sha256(f"{url}\0{json.dumps(payload, sort_keys=True)}".encode("utf-8")).hexdigest()
+        response_data = await _single_flight(key, lambda: post_gemini(client, url, payload))
+    else:
+        response_data = await post_gemini(client, url, payload)
+    try:
+        generated_text = response_data["candidates"][0]["content"]["parts"][0]["text"].strip()
+        logger.info("Successfully generated content from Gemini API")
     except (KeyError, IndexError) as e:
         error_msg = f"Failed to parse Gemini response: {e}. Response: {response_data}"
         logger.error(error_msg)
-        raise LLMError(error_msg) from e
\ No newline at end of file
+        raise LLMError(error_msg) from e
+
+    if cache is not None and _cacheable(generated_text, enforce_json):
+        await asyncio.to_thread(cache.put, cache_namespace, cache_key, generated_text)
+    return generated_text
+
+async def invoke_gemini_stream(client: httpx.AsyncClient, prompt: str, enforce_json: bool = True) -> AsyncIterator[str]:
+    """Like ``invoke_gemini`` but yields text fragments from ``streamGenerateContent`` as they arrive."""
+    if not config.GEMINI_API_KEY:
+        raise LLMError("GEMINI_API_KEY environment variable is not set")
+
+    url = f"{config.GEMINI_API_BASE_URL}/models/{config.GEMINI_MODEL}:streamGenerateContent?alt=sse&key={config.GEMINI_API_KEY}"
+    payload = _generation_payload(prompt, enforce_json)
+
+    logger.info(f"Streaming from Gemini API with model {config.GEMINI_MODEL}")
+
+    async with gemini_response(client, url, payload, stream=True) as response:
+        try:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                if "error" in event:
+                    raise LLMError(f"Gemini stream failed: {event['error']}")
+                candidates = event.get("candidates") or [{}]
+                text = "".join(part.get("text", "") for part in candidates[0].get("content", {}).get("parts", []))
+                if text:
+                    yield text
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            error_msg = f"Gemini stream was interrupted: {e}"
+            logger.error(error_msg)
+            raise LLMError(error_msg) from e
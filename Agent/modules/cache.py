@@ -0,0 +1,219 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: the disk tier falls back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for content addressing: NFKC with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+def content_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping with optional per-entry TTL and hit/miss counters."""
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return None if entry is None else entry[0]
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class DiskVectorStore:
+    """Append-only float32 vector store backed by a memory-mapped file.
+
+    ``vectors.f32`` holds fixed-width rows and ``keys.txt`` maps ``<key> <row>`` per line.
+    Appends are serialized with an advisory file lock so several worker processes can
+    share one directory; each process tails ``keys.txt`` to pick up rows written by others.
+    """
+    def __init__(self, path: str, dim: int, max_rows: int):
+        self.path = path
+        self.dim = dim
+        self.max_rows = max_rows
+        self.row_bytes = dim * 4
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._keys_path = os.path.join(path, "keys.txt")
+        self._lock_path = os.path.join(path, ".lock")
+        for file_path in (self._vectors_path, self._keys_path, self._lock_path):
+            open(file_path, "ab").close()
+        self._index: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._mmap: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._full_logged = False
+        with self._lock:
+            self._refresh_index()
+        logger.info(f"Opened embedding disk cache at {path} with {len(self._index)} vectors.")
+
+    def _refresh_index(self):
+        valid_rows = os.path.getsize(self._vectors_path) // self.row_bytes
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._keys_offset += len(line)
+                key, _, row = line.decode("ascii").strip().partition(" ")
+                if row.isdigit() and int(row) < valid_rows:
+                    self._index[key] = int(row)
+
+    def _row(self, row: int) -> np.ndarray:
+        if self._mmap is None or self._mmap.shape[0] <= row:
+            rows = os.path.getsize(self._vectors_path) // self.row_bytes
+            self._mmap = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return np.array(self._mmap[row])
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                self._refresh_index()
+                row = self._index.get(key)
+            return None if row is None else self._row(row)
+
+    def put(self, key: str, vector: np.ndarray):
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        with self._lock, open(self._lock_path, "rb+") as lock_file:
+            if key in self._index:
+                return
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh_index()
+                if key in self._index:
+                    return
+                row = os.path.getsize(self._vectors_path) // self.row_bytes
+                if row >= self.max_rows:
+                    if not self._full_logged:
+                        logger.warning(f"Embedding disk cache is full ({self.max_rows} rows); new vectors are memory-only.")
+                        self._full_logged = True
+                    return
+                with open(self._vectors_path, "r+b") as f:
+                    f.seek(row * self.row_bytes)
+                    f.write(vector.tobytes())
+                with open(self._keys_path, "ab") as f:
+                    f.write(f"{key} {row}\n".encode("ascii"))
+                self._refresh_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-memory LRU in front of an optional disk tier."""
+    def __init__(self, encoder_id: str, max_entries: int, disk_store: Optional[DiskVectorStore] = None):
+        self.encoder_id = encoder_id
+        self.memory = LRUCache(max_entries)
+        self.disk = disk_store
+        self.disk_hits = 0
+
+    def key(self, normalized_text: str) -> str:
+        return content_hash(self.encoder_id, normalized_text)
+
+    def get_many(self, normalized_texts: List[str]) -> List[Optional[np.ndarray]]:
+        rows = []
+        for text in normalized_texts:
+            key = self.key(text)
+            vector = self.memory.get(key)
+            if vector is None and self.disk is not None:
+                vector = self.disk.get(key)
+                if vector is not None:
+                    self.disk_hits += 1
+                    self.memory.put(key, vector)
+            rows.append(vector)
+        return rows
+
+    def put_many(self, normalized_texts: List[str], vectors: np.ndarray):
+        for text, vector in zip(normalized_texts, vectors):
+            key = self.key(text)
+            vector = np.array(vector, dtype=np.float32)
+            self.memory.put(key, vector)
+            if self.disk is not None:
+                self.disk.put(key, vector)
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.disk_hits
+        return {
+            "memory": memory,
+            "disk_enabled": self.disk is not None,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_hits": self.disk_hits,
+            "hits": hits,
+            "misses": memory["misses"] - self.disk_hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,37 +1,325 @@
+import asyncio
+import functools
 import logging
+import queue
+import threading
+import time
 import uuid
-from typing import List, Optional, Tuple, Dict, Any
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple, Dict, Any
 from datetime import datetime, timezone
 import numpy as np
-from pymongo import MongoClient
+from pymongo import DeleteMany, InsertOne, MongoClient, UpdateOne
 from pymongo.collection import Collection
-from sentence_transformers import SentenceTransformer, util
-import nltk
 import config
+from modules.cache import DiskVectorStore, EmbeddingCache, LRUCache, content_hash, normalize_text
+from modules import segmentation, vector_codec, vector_index
+from modules.segmentation import Chunk
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
+# Part of every chunk's source_hash; bump when chunking or field extraction changes
+# so the next reindex re-embeds all fields instead of keeping stale chunks.
+INDEX_SCHEMA_VERSION = "3"
+# Contact fields every retrieval returns alongside the semantic matches.
+ESSENTIAL_SOURCE_TYPES = ("fullName", "email", "phone")
+
+class EmbeddingBatcher:
+    """Coalesces concurrent encode requests into a single model forward pass.
+
+    Callers submit a list of texts and get back a future resolving to their own
+    rows. A background thread collects requests for up to ``window_ms`` (or until
+    ``max_batch_size`` texts are pending), runs one encode and splits the result.
+    With an ``executor``, encodes run there with at most ``max_in_flight`` batches
+    at once; while every slot is busy, new requests accumulate into the next batch.
+    """
+    def __init__(self, encode_fn, window_ms: float, max_batch_size: int,
+                 executor: Optional[Executor] = None, max_in_flight: int = 1):
+        self._encode_fn = encode_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._executor = executor
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._stats_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closing = False
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+
+    def start(self):
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._closing = False
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the batching thread; requests it never picked up fail instead of waiting forever."""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+            thread, self._thread = self._thread, None
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None and item[1].set_running_or_notify_cancel():
+                    item[1].set_exception(RuntimeError("Embedding batcher stopped before encoding this request."))
+            if thread.is_alive():
+                # Still inside an encode past the timeout: put the stop marker back so it exits afterwards.
+                logger.warning(f"Embedding batcher thread did not stop within {timeout}s.")
+                self._queue.put(None)
+
+    def submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        # Under the lock so a request cannot slip into the queue after stop() drained it.
+        with self._lock:
+            self._start_locked()
+            self._queue.put((list(texts), future))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        first = self._queue.get()
+        if first is None:
+            self._closing = True
+            return []
+        pending, size = [first], len(first[0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._closing = True
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while not self._closing:
+            if self._executor is None:
+                pending = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+                if pending:
+                    self._dispatch(pending)
+                continue
+            self._slots.acquire()
+            pending = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if pending:
+                self._executor.submit(self._dispatch_and_release, pending)
+            else:
+                self._slots.release()
+
+    def _dispatch_and_release(self, pending: List[Tuple[List[str], Future]]):
+        try:
+            self._dispatch(pending)
+        finally:
+            self._slots.release()
+
+    def _dispatch(self, pending: List[Tuple[List[str], Future]]):
+        texts = [text for item_texts, _ in pending for text in item_texts]
+        try:
+            embeddings = self._encode_fn(texts) if texts else np.empty((0, config.EMBEDDING_DIM), dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Batched encode of {len(texts)} texts failed: {e}")
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        with self._stats_lock:
+            self.batches += 1
+            self.requests += len(pending)
+            self.texts += len(texts)
+        offset = 0
+        for item_texts, future in pending:
+            future.set_result(embeddings[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
 class EmbeddingState:
     def __init__(self):
-        self.model: Optional[SentenceTransformer] = None
+        self.model: Optional["SentenceTransformer"] = None
+        self.batcher: Optional[EmbeddingBatcher] = None
+        self.cache: Optional[EmbeddingCache] = None
+        self.pool = None
+        self.retriever = None
+        self.segmenter = None
+        self.reference_cache: Optional[LRUCache] = None
+        self.db_executor: Optional[ThreadPoolExecutor] = None
+        self.inference_executor: Optional[ThreadPoolExecutor] = None
         self.mongo_client: Optional[MongoClient] = None
         self.db = None
 
 state = EmbeddingState()
 
+def get_db_executor() -> ThreadPoolExecutor:
+    if state.db_executor is None:
+        state.db_executor = ThreadPoolExecutor(max_workers=config.DB_EXECUTOR_MAX_WORKERS, thread_name_prefix="mongo-io")
+    return state.db_executor
+
+def _inference_parallelism() -> int:
+    # With a worker pool each in-flight batch is fanned out across the processes, so one
+    # dispatch thread per worker is enough to keep all of them busy.
+    return config.EMBEDDING_POOL_WORKERS if config.EMBEDDING_POOL_WORKERS > 0 else config.INFERENCE_MAX_WORKERS
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    if state.inference_executor is None:
+        state.inference_executor = ThreadPoolExecutor(
+            max_workers=_inference_parallelism(), thread_name_prefix="embedding-inference"
+        )
+    return state.inference_executor
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking pymongo call (or anything built on one) on the Mongo I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(fn, *args, **kwargs))
+
+def encoder_id() -> str:
+    """Identifies the vectors the configured encoder produces; int8 ONNX vectors differ from torch ones."""
+    if config.EMBEDDING_BACKEND == "onnx":
+        return f"{config.MODEL_NAME}|onnx|{config.ONNX_MODEL_FILE}"
+    return f"{config.MODEL_NAME}|{config.EMBEDDING_BACKEND}"
+
+def create_encoder():
+    """Build the encoder selected by EMBEDDING_BACKEND; both expose SentenceTransformer.encode."""
+    if config.EMBEDDING_BACKEND == "onnx":
+        from modules.onnx_encoder import OnnxEncoder
+        logger.info(f"Loading ONNX encoder from {config.ONNX_MODEL_DIR}")
+        return OnnxEncoder(config.ONNX_MODEL_DIR, config.ONNX_MODEL_FILE, config.ONNX_INTRA_OP_THREADS)
+    if config.EMBEDDING_BACKEND != "torch":
+        raise ValueError(f"Unknown embedding backend '{config.EMBEDDING_BACKEND}'. Expected 'torch' or 'onnx'.")
+    from sentence_transformers import SentenceTransformer
+    if config.INFERENCE_TORCH_THREADS > 0:
+        import torch
+        torch.set_num_threads(config.INFERENCE_TORCH_THREADS)
+    logger.info(f"Loading sentence transformer model: {config.MODEL_NAME}")
+    return SentenceTransformer(config.MODEL_NAME)
+
 def load_model():
-    """Load the sentence transformer model if not already loaded."""
+    """Load the embedding model if not already loaded."""
     if state.model is None:
-        logger.info(f"Loading sentence transformer model: {config.MODEL_NAME}")
-        state.model = SentenceTransformer(config.MODEL_NAME)
+        if config.EMBEDDING_POOL_WORKERS > 0:
+            from modules.embedding_pool import EmbeddingWorkerPool
+            state.model = state.pool = EmbeddingWorkerPool(
+                config.EMBEDDING_POOL_WORKERS, config.EMBED_BATCH_MAX_SIZE, config.EMBEDDING_DIM,
+                config.EMBEDDING_POOL_THREADS_PER_WORKER
+            )
+        else:
+            state.model = create_encoder()
         logger.info("Model loaded successfully.")
+    if config.EMBED_BATCH_ENABLED and state.batcher is None:
+        state.batcher = EmbeddingBatcher(
+            _encode, config.EMBED_BATCH_WINDOW_MS, config.EMBED_BATCH_MAX_SIZE,
+            executor=get_inference_executor(), max_in_flight=_inference_parallelism()
+        )
+        state.batcher.start()
+    if config.EMBED_CACHE_ENABLED and state.cache is None:
+        disk_store = None
+        if config.EMBED_CACHE_DISK_PATH:
+            disk_store = DiskVectorStore(config.EMBED_CACHE_DISK_PATH, config.EMBEDDING_DIM, config.EMBED_CACHE_DISK_MAX_ROWS)
+        state.cache = EmbeddingCache(encoder_id(), config.EMBED_CACHE_MAX_ENTRIES, disk_store)
     return state.model
 
-def embed_texts(texts: List[str]) -> np.ndarray:
+def _encode(texts: List[str]) -> np.ndarray:
+    embeddings = state.model.encode(
+        texts, batch_size=config.EMBED_BATCH_MAX_SIZE, convert_to_numpy=True, normalize_embeddings=True
+    )
+    return embeddings.astype(np.float32)
+
+def _cache_lookup(texts: List[str]) -> Tuple[List[str], List[Optional[np.ndarray]], List[str]]:
+    normalized = [normalize_text(text) for text in texts]
+    rows = state.cache.get_many(normalized)
+    missing = list(dict.fromkeys(text for text, row in zip(normalized, rows) if row is None))
+    return normalized, rows, missing
+
+def _cache_merge(normalized: List[str], rows: List[Optional[np.ndarray]], missing: List[str], encoded: np.ndarray) -> np.ndarray:
+    if missing:
+        state.cache.put_many(missing, encoded)
+        fresh = dict(zip(missing, encoded))
+        rows = [fresh[text] if row is None else row for text, row in zip(normalized, rows)]
+    if not rows:
+        return np.empty((0, config.EMBEDDING_DIM), dtype=np.float32)
+    return np.stack(rows).astype(np.float32, copy=False)
+
+def embed_texts(texts: List[str], use_cache: bool = True) -> np.ndarray:
     if state.model is None:
         raise RuntimeError("Model not loaded. Call load_model() first.")
-    embeddings = state.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
-    return embeddings.astype(np.float32)
+    if not use_cache or state.cache is None:
+        return _encode_batched(texts)
+    normalized, rows, missing = _cache_lookup(texts)
+    encoded = _encode_batched(missing) if missing else None
+    return _cache_merge(normalized, rows, missing, encoded)
+
+def _encode_batched(texts: List[str]) -> np.ndarray:
+    if state.batcher is None:
+        return _encode(texts)
+    return state.batcher.submit(texts).result()
+
+async def aembed_texts(texts: List[str], use_cache: bool = True) -> np.ndarray:
+    """Awaitable variant of embed_texts that waits on the batcher without blocking the loop."""
+    if state.model is None:
+        raise RuntimeError("Model not loaded. Call load_model() first.")
+    if not use_cache or state.cache is None:
+        return await _aencode_batched(texts)
+    if state.cache.disk is None:
+        normalized, rows, missing = _cache_lookup(texts)
+        encoded = await _aencode_batched(missing) if missing else None
+        return _cache_merge(normalized, rows, missing, encoded)
+    # The disk tier re-reads its key file on misses and takes a file lock on writes; keep that off the loop.
+    normalized, rows, missing = await asyncio.to_thread(_cache_lookup, texts)
+    encoded = await _aencode_batched(missing) if missing else None
+    return await asyncio.to_thread(_cache_merge, normalized, rows, missing, encoded)
+
+async def _aencode_batched(texts: List[str]) -> np.ndarray:
+    if state.batcher is None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_inference_executor(), _encode, texts)
+    return await asyncio.wrap_future(state.batcher.submit(texts))
+
+def shutdown():
+    """Stop background embedding threads and close the Mongo client."""
+    if state.batcher:
+        state.batcher.stop()
+        state.batcher = None
+    for executor in (state.inference_executor, state.db_executor):
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+    state.inference_executor = state.db_executor = None
+    if state.pool:
+        state.pool.close()
+        state.model = state.pool = None
+    if state.mongo_client:
+        state.mongo_client.close()
+        state.mongo_client = state.db = None
+
+def get_stats() -> Dict[str, Any]:
+    return {
+        "batcher": state.batcher.stats() if state.batcher else None,
+        "pool": state.pool.stats() if state.pool else None,
+        "cache": state.cache.stats() if state.cache else None,
+        "retrieval": state.retriever.stats() if state.retriever else None,
+        "semantic_reference_cache": state.reference_cache.stats() if state.reference_cache is not None else None,
+    }
 
 def embed_text(text: str) -> np.ndarray:
     return embed_texts([text])[0]
@@ -39,8 +327,16 @@ def embed_text(text: str) -> np.ndarray:
 def init_db():
     """Initialize MongoDB connection if not already connected."""
     if state.mongo_client is None:
-        logger.info("Connecting to MongoDB Atlas...")
-        state.mongo_client = MongoClient(config.MONGO_URI)
+        if not config.MONGO_URI:
+            raise ValueError("MONGO_URI environment variable not set.")
+        logger.info(f"Using MongoDB database '{config.MONGO_DB_NAME}'.")
+        if config.MONGO_URI.startswith("mongomock://"):
+            import mongomock
+            logger.info("Using in-memory mongomock database.")
+            state.mongo_client = mongomock.MongoClient()
+        else:
+            logger.info("Connecting to MongoDB Atlas...")
+            state.mongo_client = MongoClient(config.MONGO_URI)
         state.db = state.mongo_client[config.MONGO_DB_NAME]
         try:
             state.mongo_client.admin.command('ping')
@@ -53,32 +349,33 @@ def get_chunks_collection() -> Collection:
     if state.db is None: init_db()
     return state.db["chunks"]
 
-def chunk_text(text: str, max_words: int = 150) -> List[str]:
-    if not text or not text.strip(): return []
-    try:
-        sentences = nltk.sent_tokenize(text)
-    except LookupError:
-        logger.info("Downloading NLTK 'punkt' tokenizer...")
-        nltk.download("punkt", quiet=True)
-        sentences = nltk.sent_tokenize(text)
-    chunks, current_chunk, current_word_count = [], [], 0
-    for sentence in sentences:
-        words = len(sentence.split())
-        if current_word_count + words > max_words and current_chunk:
-            chunks.append(' '.join(current_chunk))
-            current_chunk, current_word_count = [sentence], words
-        else:
-            current_chunk.append(sentence)
-            current_word_count += words
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
-    return chunks
-
-def index_user_profile(user_id: str) -> int:
-    profiles_collection = state.db["profiles"]
-    profile_data = profiles_collection.find_one({"user_id": user_id})
-    if not profile_data:
-        raise ValueError(f"Profile for user_id '{user_id}' not found.")
+def get_retriever():
+    if state.retriever is None:
+        state.retriever = vector_index.create_backend(config.RETRIEVAL_BACKEND)
+        logger.info(f"Using '{state.retriever.name}' retrieval backend.")
+        if state.retriever.name == "atlas" and config.EMBEDDING_STORAGE_FORMAT == "float16":
+            logger.warning("EMBEDDING_STORAGE_FORMAT=float16 cannot be indexed by Atlas $vectorSearch; use RETRIEVAL_BACKEND=local.")
+    return state.retriever
+
+def get_segmenter():
+    if state.segmenter is None:
+        state.segmenter = segmentation.create_segmenter(config.CHUNK_SEGMENTER)
+    return state.segmenter
+
+def ensure_tokenizer_data():
+    """Prepare the configured segmenter; only the NLTK segmenter has data to resolve."""
+    get_segmenter().prepare()
+
+def warmup():
+    """Run one uncached encode so the first real request does not pay for lazy initialisation."""
+    embed_texts(["Senior software engineer with Python experience."], use_cache=False)
+
+def chunk_text(text: str, max_words: int = 150) -> Iterator[Chunk]:
+    """Yield chunks of whole sentences, each at most ``max_words`` words where possible."""
+    if not text or not text.strip(): return
+    yield from segmentation.chunk_sentences(get_segmenter().split(text), max_words)
+
+def _extract_profile_fields(profile_data: Dict[str, Any]) -> List[Tuple[str, str, str]]:
     text_fields = []
     for key in ['fullName', 'summary', 'bio', 'headline']:
         if profile_data.get(key): 
@@ -108,56 +405,119 @@ def index_user_profile(user_id: str) -> int:
     if profile_data.get('certifications'):
         cert_text = ', '.join(profile_data['certifications'])
         text_fields.append(('certifications', '0', cert_text))
-    if not text_fields: return 0
+    return text_fields
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+def _field_hash(source_type: str, text: str) -> str:
+    return content_hash(INDEX_SCHEMA_VERSION, encoder_id(), config.CHUNK_SEGMENTER, source_type, normalize_text(text))
+
+def _field_key(source_type: str, source_id: str) -> Tuple[str, str]:
+    return source_type, source_id.rsplit("_", 1)[0]
+
+def index_user_profile(user_id: str) -> Dict[str, Any]:
+    """Incrementally reindex a profile, re-embedding only fields whose content hash changed.
+
+    Every chunk stores the hash of the field it was cut from. Fields with an unchanged
+    hash keep their chunks, changed or new fields are chunked and encoded in one batch,
+    and chunks whose field disappeared are deleted. All writes go out in one bulk_write.
+    """
+    timings: Dict[str, float] = {}
+    started = stage_started = time.perf_counter()
+    profile_data = state.db["profiles"].find_one({"user_id": user_id})
+    if not profile_data:
+        raise ValueError(f"Profile for user_id '{user_id}' not found.")
     chunks_collection = get_chunks_collection()
-    chunks_collection.delete_many({"user_id": user_id, "index_namespace": "profile"})
-    total_chunks = 0
-    for source_type, source_id, text in text_fields:
-        chunks = chunk_text(text)
-        if not chunks: continue
-        embeddings = embed_texts(chunks)
-        docs = []
-        for i, chunk in enumerate(chunks):
-            docs.append({
+    existing: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for doc in chunks_collection.find(
+        {"user_id": user_id, "index_namespace": "profile"},
+        {"_id": 1, "source_type": 1, "source_id": 1, "source_hash": 1}
+    ):
+        group = existing.setdefault(_field_key(doc["source_type"], doc["source_id"]), {})
+        group.setdefault(doc["source_id"], []).append(doc)
+    timings["fetch_ms"] = _elapsed_ms(stage_started)
+
+    stage_started = time.perf_counter()
+    kept, pending = 0, []
+    for source_type, source_id, text in _extract_profile_fields(profile_data):
+        field_hash = _field_hash(source_type, text)
+        group = existing.get((source_type, source_id), {})
+        docs = [doc for chunk_docs in group.values() for doc in chunk_docs]
+        if docs and len(docs) == len(group) and all(doc.get("source_hash") == field_hash for doc in docs):
+            kept += len(docs)
+            existing.pop((source_type, source_id))
+            continue
+        for i, chunk in enumerate(chunk_text(text)):
+            pending.append((source_type, f"{source_id}_{i}", chunk.text, field_hash))
+    timings["chunk_ms"] = _elapsed_ms(stage_started)
+
+    stage_started = time.perf_counter()
+    embeddings = embed_texts([chunk for _, _, chunk, _ in pending]) if pending else None
+    timings["embed_ms"] = _elapsed_ms(stage_started)
+
+    stage_started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    operations, added, updated = [], 0, 0
+    for i, (source_type, source_id, chunk, field_hash) in enumerate(pending):
+        fields = {
+            "text": chunk, "source_hash": field_hash, "updated_at": now,
+            **vector_codec.encode_embedding(embeddings[i], config.EMBEDDING_STORAGE_FORMAT)
+        }
+        chunk_docs = existing.get(_field_key(source_type, source_id), {}).pop(source_id, None)
+        if chunk_docs:
+            update = {"$set": fields}
+            if "embedding_scale" not in fields:
+                update["$unset"] = {"embedding_scale": ""}
+            operations.append(UpdateOne({"_id": chunk_docs[0]["_id"]}, update))
+            existing[_field_key(source_type, source_id)][source_id] = chunk_docs[1:]
+            updated += 1
+        else:
+            operations.append(InsertOne({
                 "_id": str(uuid.uuid4()), "user_id": user_id, "index_namespace": "profile",
-                "source_type": source_type, "source_id": f"{source_id}_{i}", "text": chunk,
-                "embedding": embeddings[i].tolist(), "created_at": datetime.now(timezone.utc)
-            })
-        if docs:
-            chunks_collection.insert_many(docs)
-            total_chunks += len(docs)
+                "source_type": source_type, "source_id": source_id, "created_at": now, **fields
+            }))
+            added += 1
+    orphan_ids = [doc["_id"] for group in existing.values() for chunk_docs in group.values() for doc in chunk_docs]
+    if orphan_ids:
+        operations.append(DeleteMany({"_id": {"$in": orphan_ids}}))
+    if operations:
+        chunks_collection.bulk_write(operations, ordered=False)
     state.db["users"].update_one(
         {"user_id": user_id},
-        {"$set": {"embeddings_last_updated": datetime.now(timezone.utc)}},
+        {"$set" if operations else "$setOnInsert": {"embeddings_last_updated": now}},
         upsert=True
     )
-    return total_chunks
+    timings["write_ms"] = _elapsed_ms(stage_started)
+    timings["total_ms"] = _elapsed_ms(started)
+    result = {
+        "total_chunks": kept + added + updated, "kept": kept, "added": added,
+        "updated": updated, "removed": len(orphan_ids), "timings_ms": timings
+    }
+    if operations:
+        get_retriever().invalidate(user_id)
+    logger.info(f"Reindexed profile for user '{user_id}': {result}")
+    return result
 
 def retrieve_chunks(user_id: str, query_text: str, top_k: int, namespace: str = "profile") -> List[Dict[str, Any]]:
-    if not state.db["users"].find_one({"user_id": user_id}):
+    user = state.db["users"].find_one({"user_id": user_id}, {"embeddings_last_updated": 1})
+    if not user:
         logger.info(f"User '{user_id}' not indexed. Triggering autonomous indexing...")
         index_user_profile(user_id)
         logger.info(f"Autonomous indexing for user '{user_id}' complete.")
-    query_vector = embed_text(query_text).tolist()
-    pipeline = [
-        {"$vectorSearch": {
-            "index": "vector_index", "path": "embedding", "queryVector": query_vector,
-            "numCandidates": top_k * 10, "limit": top_k, 
-            "filter": {"user_id": user_id, "index_namespace": namespace},
-        }},
-        {"$project": {
-            "chunk_id": "$_id", "text": 1, "source_type": 1, "source_id": 1,
-            "score": {"$meta": "vectorSearchScore"}
-        }}
-    ]
-    semantic_results = list(get_chunks_collection().aggregate(pipeline))
-    essential_source_types = ["fullName", "email", "phone"]
+        user = state.db["users"].find_one({"user_id": user_id}, {"embeddings_last_updated": 1}) or {}
+    query_vector = embed_text(query_text)
+    semantic_results = get_retriever().search(
+        get_chunks_collection(), user_id, namespace, query_vector, top_k,
+        version=user.get("embeddings_last_updated")
+    )
     essential_chunks = list(get_chunks_collection().find({
         "user_id": user_id, 
         "index_namespace": namespace,
-        "source_type": {"$in": essential_source_types}
-    }, {"chunk_id": "$_id", "text": 1, "source_type": 1, "source_id": 1}).limit(5))
+        "source_type": {"$in": list(ESSENTIAL_SOURCE_TYPES)}
+    }, {"text": 1, "source_type": 1, "source_id": 1}).limit(5))
     for chunk in essential_chunks:
+        chunk["chunk_id"] = chunk.pop("_id")
         chunk["score"] = 1.0
     seen_chunks = set()
     combined_results = []
@@ -174,7 +534,144 @@ def retrieve_chunks(user_id: str, query_text: str, top_k: int, namespace: str =
     max_results = min(top_k + len(essential_chunks), 15)
     return combined_results[:max_results]
 
+async def retrieve_chunks_async(user_id: str, query_text: str, top_k: int, namespace: str = "profile") -> List[Dict[str, Any]]:
+    return await run_db(retrieve_chunks, user_id, query_text, top_k, namespace)
+
+async def index_user_profile_async(user_id: str) -> Dict[str, Any]:
+    return await run_db(index_user_profile, user_id)
+
+def _cosine_to_unit(a: np.ndarray, b: np.ndarray) -> float:
+    cosine_score = float(np.dot(a, b) / max(float(np.linalg.norm(a) * np.linalg.norm(b)), 1e-12))
+    return (cosine_score + 1) / 2
+
+SEMANTIC_AGGREGATIONS = ("max_mean", "topk_mean")
+
+def _semantic_chunks(text: str) -> List[str]:
+    """Split text into pieces that fit the encoder window; over-long sentences are cut into word windows."""
+    max_words = config.SEMANTIC_CHUNK_WORDS
+    chunks: List[str] = []
+    for chunk in chunk_text(text, max_words):
+        if chunk.word_count <= max_words:
+            chunks.append(chunk.text)
+        else:
+            words = chunk.text.split()
+            chunks.extend(" ".join(words[i:i + max_words]) for i in range(0, len(words), max_words))
+        if len(chunks) >= config.SEMANTIC_MAX_CHUNKS:
+            break
+    return chunks[:config.SEMANTIC_MAX_CHUNKS]
+
+def _scoring_chunks(text: str) -> List[str]:
+    """Chunks a text is scored by; text that yields none (blank or punctuation only) counts as one chunk."""
+    return _semantic_chunks(text) or [text]
+
+def aggregate_chunk_similarity(similarity: np.ndarray, aggregation: str, top_k: int) -> float:
+    """Collapse a (reference chunks x candidate chunks) cosine matrix into one score on the (1 + cos) / 2 scale.
+
+    ``max_mean`` averages, over reference chunks, the best-matching candidate chunk (coverage of
+    the reference). ``topk_mean`` averages each reference chunk's ``top_k`` best matches instead,
+    rewarding candidates that address a requirement in more than one place.
+    """
+    if aggregation == "max_mean":
+        per_chunk = similarity.max(axis=1)
+    elif aggregation == "topk_mean":
+        k = min(max(top_k, 1), similarity.shape[1])
+        per_chunk = np.partition(similarity, similarity.shape[1] - k, axis=1)[:, -k:].mean(axis=1)
+    else:
+        raise ValueError(f"Unknown semantic aggregation '{aggregation}'. Expected one of {SEMANTIC_AGGREGATIONS}.")
+    return float(np.clip((per_chunk.mean() + 1) / 2, 0.0, 1.0))
+
+def _get_reference_cache() -> LRUCache:
+    if state.reference_cache is None:
+        state.reference_cache = LRUCache(config.SEMANTIC_REFERENCE_CACHE_MAX_ENTRIES)
+    return state.reference_cache
+
+def _reference_key(reference: str) -> str:
+    return content_hash(encoder_id(), config.CHUNK_SEGMENTER, str(config.SEMANTIC_CHUNK_WORDS), normalize_text(reference))
+
+def _plan_chunked_score(reference: str, candidate: str):
+    """Return the cached reference chunk matrix (if any) and the texts that still need encoding."""
+    key = _reference_key(reference)
+    reference_matrix = _get_reference_cache().get(key)
+    reference_chunks = [] if reference_matrix is not None else _scoring_chunks(reference)
+    return key, reference_matrix, reference_chunks, _scoring_chunks(candidate)
+
+def _finish_chunked_score(key: str, reference_matrix: Optional[np.ndarray], reference_chunks: List[str],
+                          embeddings: np.ndarray) -> float:
+    if reference_matrix is None:
+        reference_matrix = np.array(embeddings[:len(reference_chunks)])
+        _get_reference_cache().put(key, reference_matrix)
+        embeddings = embeddings[len(reference_chunks):]
+    return aggregate_chunk_similarity(reference_matrix @ embeddings.T, config.SEMANTIC_AGGREGATION, config.SEMANTIC_TOP_K)
+
 def compute_semantic_score(text1: str, text2: str) -> float:
+    """Similarity of ``text2`` (resume) to ``text1`` (job description) on a 0-1 scale.
+
+    In ``chunked`` SEMANTIC_SCORING_MODE both texts are split into encoder-sized chunks and
+    scored through a chunk x chunk similarity matrix; ``text1``'s chunk embeddings are cached.
+    """
+    if config.SEMANTIC_SCORING_MODE == "chunked":
+        key, reference_matrix, reference_chunks, candidate_chunks = _plan_chunked_score(text1, text2)
+        embeddings = embed_texts(reference_chunks + candidate_chunks)
+        return _finish_chunked_score(key, reference_matrix, reference_chunks, embeddings)
     embeddings = embed_texts([text1, text2])
-    cosine_score = util.cos_sim(embeddings[0], embeddings[1]).item()
-    return (cosine_score + 1) / 2
\ No newline at end of file
+    return _cosine_to_unit(embeddings[0], embeddings[1])
+
+async def compute_semantic_score_async(text1: str, text2: str) -> float:
+    if config.SEMANTIC_SCORING_MODE == "chunked":
+        # Segmenting long texts is CPU work too, so it runs off the event loop with the encode.
+        key, reference_matrix, reference_chunks, candidate_chunks = await asyncio.to_thread(_plan_chunked_score, text1, text2)
+        embeddings = await aembed_texts(reference_chunks + candidate_chunks)
+        return _finish_chunked_score(key, reference_matrix, reference_chunks, embeddings)
+    embeddings = await aembed_texts([text1, text2])
+    return _cosine_to_unit(embeddings[0], embeddings[1])
+
+def _plan_chunked_batch(references: List[str], candidates: List[str]):
+    """Collect every chunk that needs encoding for a reference x candidate batch, with its offsets."""
+    cache = _get_reference_cache()
+    texts: List[str] = []
+    reference_parts = []
+    for reference in references:
+        key = _reference_key(reference)
+        matrix = cache.get(key)
+        if matrix is None:
+            chunks = _scoring_chunks(reference)
+            reference_parts.append((key, None, (len(texts), len(texts) + len(chunks))))
+            texts.extend(chunks)
+        else:
+            reference_parts.append((key, matrix, None))
+    candidates_offset = len(texts)
+    candidate_spans = []
+    for candidate in candidates:
+        chunks = _scoring_chunks(candidate)
+        candidate_spans.append((len(texts) - candidates_offset, len(texts) - candidates_offset + len(chunks)))
+        texts.extend(chunks)
+    return texts, reference_parts, candidates_offset, candidate_spans
+
+def _finish_chunked_batch(embeddings: np.ndarray, reference_parts, candidates_offset: int, candidate_spans) -> np.ndarray:
+    candidate_matrix = embeddings[candidates_offset:]
+    scores = np.empty((len(reference_parts), len(candidate_spans)), dtype=np.float32)
+    for r, (key, reference_matrix, span) in enumerate(reference_parts):
+        if reference_matrix is None:
+            reference_matrix = np.array(embeddings[span[0]:span[1]])
+            _get_reference_cache().put(key, reference_matrix)
+        similarity = reference_matrix @ candidate_matrix.T
+        for c, (start, end) in enumerate(candidate_spans):
+            scores[r, c] = aggregate_chunk_similarity(similarity[:, start:end], config.SEMANTIC_AGGREGATION, config.SEMANTIC_TOP_K)
+    return scores
+
+async def compute_semantic_matrix_async(references: List[str], candidates: List[str]) -> np.ndarray:
+    """Semantic scores (0-1) for every reference x candidate pair, shape ``(len(references), len(candidates))``.
+
+    All texts of the batch are encoded in one call and scored with a single matrix product
+    per reference; honours SEMANTIC_SCORING_MODE like compute_semantic_score.
+    """
+    if config.SEMANTIC_SCORING_MODE == "chunked":
+        texts, reference_parts, candidates_offset, candidate_spans = await asyncio.to_thread(
+            _plan_chunked_batch, references, candidates
+        )
+        embeddings = await aembed_texts(texts)
+        return _finish_chunked_batch(embeddings, reference_parts, candidates_offset, candidate_spans)
+    embeddings = await aembed_texts(references + candidates)
+    embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+    similarity = embeddings[:len(references)] @ embeddings[len(references):].T
+    return np.clip((similarity + 1) / 2, 0.0, 1.0)
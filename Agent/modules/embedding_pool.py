@@ -0,0 +1,221 @@
+import logging
+import math
+import multiprocessing as mp
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import List, Optional
+import numpy as np
+import config
+
+logger = logging.getLogger(__name__)
+
+def _worker_main(conn, shm_name: str, capacity: int, dim: int, threads: int):
+    """Encoder process: loads one model, then encodes text batches into its shared-memory slot."""
+    config.INFERENCE_TORCH_THREADS = threads
+    config.ONNX_INTRA_OP_THREADS = threads
+    from modules import embedding
+    try:
+        model = embedding.create_encoder()
+    except Exception as e:
+        conn.send(("error", repr(e)))
+        return
+    shm = shared_memory.SharedMemory(name=shm_name)
+    output = np.ndarray((capacity, dim), dtype=np.float32, buffer=shm.buf)
+    conn.send(("ready", None))
+    try:
+        while True:
+            try:
+                texts = conn.recv()
+            except EOFError:
+                break
+            if texts is None:
+                break
+            try:
+                embeddings = model.encode(texts, batch_size=max(len(texts), 1), convert_to_numpy=True, normalize_embeddings=True)
+                output[:len(texts)] = embeddings
+                conn.send(("ok", len(texts)))
+            except Exception as e:
+                conn.send(("error", repr(e)))
+    finally:
+        del output
+        shm.close()
+
+class _Worker:
+    def __init__(self, index: int, process, conn, shm: shared_memory.SharedMemory, capacity: int, dim: int):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.shm = shm
+        self.output = np.ndarray((capacity, dim), dtype=np.float32, buffer=shm.buf)
+
+class EmbeddingWorkerPool:
+    """Process pool of encoders for saturating many cores from one API process.
+
+    Each worker process holds one model instance and owns a shared-memory output buffer
+    of ``capacity`` rows; only the (small) text lists cross the pipe, and embeddings are
+    read straight out of shared memory. ``encode`` fans a batch out across idle workers,
+    so it is a drop-in replacement for ``SentenceTransformer.encode`` in the embedding module.
+    """
+    def __init__(self, num_workers: int, capacity: int, dim: int, threads_per_worker: int = 1):
+        self.capacity = capacity
+        self.dim = dim
+        self.threads_per_worker = threads_per_worker
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._ctx = mp.get_context("spawn")
+        self.calls = 0
+        self.texts = 0
+        self.respawns = 0
+        for i in range(num_workers):
+            self._workers.append(self._start(i, shared_memory.SharedMemory(create=True, size=capacity * dim * 4)))
+        try:
+            for worker in self._workers:
+                self._wait_ready(worker)
+                self._idle.put(worker)
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"Started {num_workers} embedding worker processes ({threads_per_worker} threads each).")
+
+    def _start(self, index: int, shm: shared_memory.SharedMemory) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main, args=(child_conn, shm.name, self.capacity, self.dim, self.threads_per_worker),
+            name=f"embedding-worker-{index}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(index, process, parent_conn, shm, self.capacity, self.dim)
+
+    @staticmethod
+    def _wait_ready(worker: _Worker):
+        status, payload = worker.conn.recv()
+        if status != "ready":
+            raise RuntimeError(f"Embedding worker {worker.index} failed to load the model: {payload}")
+
+    def _respawn(self, worker: _Worker) -> Optional[_Worker]:
+        """Replace a dead or out-of-sync worker with a fresh process on the same shared-memory slot."""
+        logger.warning(f"Respawning embedding worker {worker.index} (exit code {worker.process.exitcode}).")
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(timeout=5.0)
+        worker.conn.close()
+        del worker.output
+        replacement = self._start(worker.index, worker.shm)
+        try:
+            self._wait_ready(replacement)
+        except (RuntimeError, EOFError, OSError) as e:
+            logger.error(f"Embedding worker {worker.index} could not be respawned: {e}")
+            replacement.process.join(timeout=5.0)
+            with self._lock:
+                self._workers[self._workers.index(worker)] = replacement
+            return None
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+            self.respawns += 1
+        return replacement
+
+    def _release(self, worker: _Worker, pending: bool, broken: bool = False):
+        """Return a worker to the idle queue with no reply left unread, respawning it if it died
+        or its pipe broke.
+
+        A worker still holding a part from a failed wave is drained first: its reply would
+        otherwise be read by the next ``encode``, which would copy rows it may still be writing.
+        """
+        if pending and not broken and worker.process.is_alive():
+            try:
+                worker.conn.recv()
+                pending = False
+            except (EOFError, OSError):
+                pass
+        if pending or broken or not worker.process.is_alive():
+            worker = self._respawn(worker)
+            if worker is None:
+                return
+        self._idle.put(worker)
+
+    def _acquire_wave(self, wanted: int) -> List[_Worker]:
+        wave = [self._idle.get()]
+        while len(wave) < wanted:
+            try:
+                wave.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        return wave
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True) -> np.ndarray:
+        output = np.empty((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return output
+        if not any(worker.process.is_alive() for worker in self._workers):
+            raise RuntimeError("Embedding worker pool has no live workers.")
+        part_size = min(self.capacity, max(1, math.ceil(len(texts) / len(self._workers))))
+        parts = [(start, texts[start:start + part_size]) for start in range(0, len(texts), part_size)]
+        done = 0
+        while done < len(parts):
+            wave = self._acquire_wave(len(parts) - done)
+            pending, broken = set(), set()
+            errors = []
+            try:
+                sent = []
+                for worker, (start, part) in zip(wave, parts[done:]):
+                    try:
+                        worker.conn.send(part)
+                    except OSError as e:
+                        errors.append(f"worker {worker.index} unreachable ({e})")
+                        broken.add(worker.index)
+                        continue
+                    pending.add(worker.index)
+                    sent.append((worker, start, part))
+                for worker, start, part in sent:
+                    try:
+                        status, payload = worker.conn.recv()
+                    except EOFError:
+                        errors.append(f"worker {worker.index} exited (exit code {worker.process.exitcode})")
+                        continue
+                    pending.discard(worker.index)
+                    if status != "ok":
+                        errors.append(f"worker {worker.index}: {payload}")
+                    elif payload != len(part):
+                        errors.append(f"worker {worker.index} encoded {payload} texts, expected {len(part)}")
+                    else:
+                        output[start:start + len(part)] = worker.output[:len(part)]
+            finally:
+                for worker in wave:
+                    self._release(worker, worker.index in pending, worker.index in broken)
+            if errors:
+                raise RuntimeError(f"Embedding worker pool encode failed: {'; '.join(errors)}")
+            done += len(wave)
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+        return output
+
+    def close(self, timeout: float = 5.0):
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+            del worker.output
+            worker.shm.close()
+            worker.shm.unlink()
+        self._workers = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "alive": sum(worker.process.is_alive() for worker in self._workers),
+            "idle": self._idle.qsize(),
+            "calls": self.calls,
+            "texts": self.texts,
+            "respawns": self.respawns,
+        }
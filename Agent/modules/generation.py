@@ -1,8 +1,9 @@
+import json
 import logging
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import httpx
 from jinja2 import Template
-from modules import embedding
+from modules import embedding, prompt_budget
 import llm_client, schemas
 logger = logging.getLogger(__name__)
 FULL_RESUME_TEMPLATE = Template("""You are an AI Resume Architect. Your task is to create a complete, professional resume in JSON format based on the user's profile information and tailored to the specific job description provided.
@@ -72,23 +73,121 @@ Provide the improved section content:""")
 def format_context_for_prompt(chunks: List[schemas.ChunkItem]) -> str:
     if not chunks:
         return "No relevant context found."
-    return "\n".join([
-        f"Source: {chunk.source_type} (Relevance: {chunk.score:.2f})\nContent: {chunk.text.strip()}\n"
-        for chunk in chunks
-    ])
-async def create_full_resume(request: schemas.FullGenerateRequest, client: httpx.AsyncClient) -> str:
-    retrieved_chunks_data = embedding.retrieve_chunks(
+    return "\n".join(f"[{chunk.source_type}] {chunk.text.strip()}" for chunk in chunks)
+# Expected JSON type of each resume section; a section that parses to another type is not emitted.
+SECTION_TYPES = {"basics": dict, "experience": list, "education": list, "skills": dict}
+
+class ResumeSectionParser:
+    """Incrementally scans streamed resume JSON and returns each section as soon as it closes.
+
+    Sections are the keys of the ``"resume"`` object (or of the root object when the model
+    leaves out the wrapper). Text before the first ``{`` such as a code fence is ignored.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._section_depth: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._awaiting_value = False
+        self._value_start: Optional[int] = None
+
+    def _close_value(self, end: int) -> Optional[Tuple[str, Any]]:
+        key, raw = self._key, self.buffer[self._value_start:end]
+        self._key = self._value_start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Streamed resume section '{key}' is not valid JSON; skipping it.")
+            return None
+        expected = SECTION_TYPES.get(key)
+        if expected is not None and not isinstance(value, expected):
+            logger.warning(f"Streamed resume section '{key}' is a {type(value).__name__}, expected {expected.__name__}; skipping it.")
+            return None
+        return key, value
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Add streamed text; returns the ``(name, value)`` sections completed by it."""
+        self.buffer += text
+        buffer, sections = self.buffer, []
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            at_sections = self._depth == self._section_depth
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._expect_key and (at_sections or (self._depth == 1 and self._section_depth is None)):
+                        key = json.loads(buffer[self._string_start:i + 1])
+                        if self._section_depth is None:
+                            self._section_depth = 2 if key == "resume" else 1
+                        if self._depth == self._section_depth:
+                            self._key = key
+                        self._expect_key = False
+                    elif at_sections and self._value_start is not None:
+                        sections.append(self._close_value(i + 1))
+                continue
+            if ch.isspace() or self._depth == 0 and ch not in "{[":
+                continue
+            if self._awaiting_value and at_sections:
+                self._awaiting_value = False
+                self._value_start = i
+            if ch == '"':
+                self._in_string, self._string_start = True, i
+            elif ch in "{[":
+                self._depth += 1
+                self._expect_key = ch == "{"
+            elif ch in "}]":
+                if at_sections and self._value_start is not None:
+                    sections.append(self._close_value(i))
+                self._depth -= 1
+                if self._depth == self._section_depth and self._value_start is not None:
+                    sections.append(self._close_value(i + 1))
+            elif ch == ":" and at_sections and self._key is not None:
+                self._awaiting_value = True
+            elif ch == ",":
+                if at_sections and self._value_start is not None:
+                    sections.append(self._close_value(i))
+                self._expect_key = at_sections or (self._depth == 1 and self._section_depth is None)
+        self._pos = len(buffer)
+        return [section for section in sections if section is not None]
+
+async def _full_resume_prompt(request: schemas.FullGenerateRequest) -> str:
+    retrieved_chunks_data = await embedding.retrieve_chunks_async(
         user_id=request.user_id,
         query_text=request.job_description,
         top_k=request.top_k,
         namespace="profile"
     )
     retrieved_chunks = [schemas.ChunkItem(**c) for c in retrieved_chunks_data]
-    profile_context = format_context_for_prompt(retrieved_chunks)
     logger.info(f"Retrieved {len(retrieved_chunks)} chunks for user {request.user_id}")
-    logger.info(f"Profile context: {profile_context[:200]}...")
-    prompt = FULL_RESUME_TEMPLATE.render(
+    return await prompt_budget.build_prompt(
+        FULL_RESUME_TEMPLATE, "full_resume",
         job_description=request.job_description,
-        profile_context=profile_context
+        chunks=retrieved_chunks,
+        format_chunks=format_context_for_prompt
     )
-    return await llm_client.invoke_gemini(client, prompt, enforce_json=True)
\ No newline at end of file
+
+async def create_full_resume(request: schemas.FullGenerateRequest, client: httpx.AsyncClient) -> str:
+    prompt = await _full_resume_prompt(request)
+    return await llm_client.invoke_gemini(client, prompt, enforce_json=True)
+
+async def stream_full_resume(request: schemas.FullGenerateRequest, client: httpx.AsyncClient) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Yield ``(event, data)`` pairs: ``token`` for each Gemini fragment, ``section`` whenever a
+    resume section closes and parses, and a final ``done`` with the whole text."""
+    prompt = await _full_resume_prompt(request)
+    parser = ResumeSectionParser()
+    sections = []
+    async for text in llm_client.invoke_gemini_stream(client, prompt, enforce_json=True):
+        yield "token", {"text": text}
+        for name, content in parser.feed(text):
+            sections.append(name)
+            yield "section", {"name": name, "content": content}
+    yield "done", {"generated_text": parser.buffer.strip(), "retrieval_mode": "full", "sections": sections}
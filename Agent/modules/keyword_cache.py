@@ -0,0 +1,98 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import config
+from modules import embedding
+from modules.cache import LRUCache, content_hash, normalize_text
+
+logger = logging.getLogger(__name__)
+
+class KeywordCache:
+    """Job-description -> extracted-skills cache: LRU with TTL in front of an optional Mongo tier.
+
+    Entries are keyed by the normalized JD, the Gemini model and the prompt version, so a
+    prompt or model change never serves stale extractions. The Mongo collection carries a
+    TTL index on ``expires_at``; reads also check it because TTL deletion runs lazily.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float, persistent: bool = False,
+                 collection_name: str = "keyword_cache"):
+        self.ttl_seconds = ttl_seconds
+        self.memory = LRUCache(max_entries, ttl_seconds=ttl_seconds)
+        self.persistent = persistent
+        self.collection_name = collection_name
+        self.persistent_hits = 0
+        self.persistent_errors = 0
+        self._index_ready = False
+
+    @staticmethod
+    def key(job_description: str, model: str, prompt_version: str) -> str:
+        return content_hash(model, prompt_version, normalize_text(job_description))
+
+    def _collection(self):
+        if not self.persistent or embedding.state.db is None:
+            return None
+        collection = embedding.state.db[self.collection_name]
+        if not self._index_ready:
+            collection.create_index("expires_at", expireAfterSeconds=0)
+            self._index_ready = True
+        return collection
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        collection = self._collection()
+        if collection is None:
+            return None
+        return collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}, {"skills": 1, "expires_at": 1})
+
+    def _store(self, key: str, skills: List[str], job_description: str):
+        collection = self._collection()
+        if collection is None:
+            return
+        now = datetime.now(timezone.utc)
+        collection.replace_one({"_id": key}, {
+            "skills": skills, "job_description": job_description, "model": config.GEMINI_MODEL,
+            "created_at": now, "expires_at": now + timedelta(seconds=self.ttl_seconds),
+        }, upsert=True)
+
+    async def get(self, key: str) -> Optional[List[str]]:
+        skills = self.memory.get(key)
+        if skills is not None or not self.persistent:
+            return skills
+        try:
+            doc = await embedding.run_db(self._load, key)
+        except Exception as e:
+            self.persistent_errors += 1
+            logger.warning(f"Keyword cache lookup in MongoDB failed: {e}")
+            return None
+        if doc is None:
+            return None
+        self.persistent_hits += 1
+        expires_at = doc["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        remaining = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        self.memory.put(key, doc["skills"], ttl_seconds=max(remaining, 1.0))
+        return doc["skills"]
+
+    async def put(self, key: str, skills: List[str], job_description: str):
+        self.memory.put(key, skills)
+        if not self.persistent:
+            return
+        try:
+            await embedding.run_db(self._store, key, skills, job_description)
+        except Exception as e:
+            self.persistent_errors += 1
+            logger.warning(f"Keyword cache write to MongoDB failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.persistent_hits
+        return {
+            "memory": memory,
+            "persistent_enabled": self.persistent,
+            "persistent_hits": self.persistent_hits,
+            "persistent_errors": self.persistent_errors,
+            "hits": hits,
+            "misses": memory["misses"] - self.persistent_hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import config
+from modules import embedding
+from modules.keyword_matcher import KeywordMatcher, normalize_form
+
+logger = logging.getLogger(__name__)
+
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills_lexicon.txt")
+SECTION_WEIGHTS = {"technical": 1.0, "generic": 0.35}
+# Technical-looking tokens that are not in the lexicon (camel case, dotted or versioned names,
+# short acronyms) are kept only if the JD repeats them, at this weight.
+UNLISTED_WEIGHT = 0.5
+# Mentions on a line that reads like a requirement count for more than mentions in boilerplate.
+REQUIREMENT_BOOST = 1.5
+
+_UNLISTED_RE = re.compile(
+    r"(?<![\w.+#])(?:[A-Z][a-z]+[A-Z][A-Za-z]*|[A-Za-z]+(?:\.[A-Za-z]+)+|[A-Z]{2,6}|[A-Za-z]+\d+[A-Za-z\d]*)(?![\w+#])"
+)
+REQUIREMENT_RE = re.compile(
+    r"\b(?:require[sd]?|requirements?|must|experience (?:with|in)|proficien\w*|qualifications?|expertise|knowledge of|familiarity with|hands-on|strong)\b",
+    re.IGNORECASE,
+)
+_UNLISTED_STOPWORDS = frozenset({
+    "US", "USA", "UK", "EU", "EEO", "EOE", "PTO", "CEO", "CTO", "CFO", "VP", "HR", "AM", "PM", "ET", "PT",
+    "OK", "FAQ", "LLC", "INC", "BS", "BA", "MS", "MA", "PHD", "MBA", "ID", "IT", "TBD", "ASAP", "NA",
+    "e.g", "i.e", "etc",
+})
+
+def load_lexicon(path: str = LEXICON_PATH) -> Dict[str, float]:
+    """Read ``skill -> weight`` from a lexicon file of ``[section]`` headers and one skill per line."""
+    lexicon: Dict[str, float] = {}
+    weight = SECTION_WEIGHTS["technical"]
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                weight = SECTION_WEIGHTS.get(line[1:-1].strip().lower(), weight)
+                continue
+            lexicon[line] = weight
+    return lexicon
+
+class LocalKeywordExtractor:
+    """Offline replacement for the LLM keyword-extraction prompt.
+
+    Candidates are lexicon skills found in the JD with the alias-aware KeywordMatcher, plus
+    repeated technical-looking tokens outside the lexicon. ``tfidf`` ranking scores each
+    candidate by ``weight * (1 + ln tf)``, where the lexicon weight stands in for IDF
+    (generic soft skills are down-weighted) and mentions on requirement lines are boosted.
+    ``embedding`` ranking additionally multiplies by the skill's similarity to the JD.
+    """
+    def __init__(self, lexicon: Dict[str, float], max_keywords: int = 15):
+        self.skills = list(lexicon)
+        self.weights = [lexicon[skill] for skill in self.skills]
+        self.max_keywords = max_keywords
+        self.matcher = KeywordMatcher(self.skills)
+        self._known_forms = {normalize_form(skill) for skill in self.skills}
+
+    @staticmethod
+    def _requirement_lines(text: str) -> List[Tuple[int, int]]:
+        spans, offset = [], 0
+        for line in text.splitlines(keepends=True):
+            if REQUIREMENT_RE.search(line):
+                spans.append((offset, offset + len(line)))
+            offset += len(line)
+        return spans
+
+    def candidates(self, job_description: str) -> Dict[str, Tuple[float, int]]:
+        """``skill -> (score, first offset)`` for every candidate in the JD."""
+        requirement_spans = self._requirement_lines(job_description)
+
+        def score(weight: float, offsets: List[int]) -> float:
+            boosted = any(start <= offset < end for offset in offsets for start, end in requirement_spans)
+            return weight * (1 + math.log(len(offsets))) * (REQUIREMENT_BOOST if boosted else 1.0)
+
+        found: Dict[str, Tuple[float, int]] = {}
+        for i, spans in self.matcher.spans(job_description).items():
+            offsets = list(dict.fromkeys(start for start, _ in spans))
+            # Report a capitalized alias the way the JD spells it ("AWS"), otherwise the lexicon spelling.
+            surface = job_description[spans[0][0]:spans[0][1]]
+            is_alias = normalize_form(surface) != normalize_form(self.skills[i])
+            skill = surface if is_alias and not surface.islower() else self.skills[i]
+            found[skill] = (score(self.weights[i], offsets), offsets[0])
+        unlisted: Dict[str, List[int]] = {}
+        for match in _UNLISTED_RE.finditer(job_description):
+            token = match.group()
+            if token in _UNLISTED_STOPWORDS or token.upper() in _UNLISTED_STOPWORDS or normalize_form(token) in self._known_forms:
+                continue
+            unlisted.setdefault(token, []).append(match.start())
+        for token, offsets in unlisted.items():
+            if len(offsets) >= 2 and token not in found:
+                found[token] = (score(UNLISTED_WEIGHT, offsets), offsets[0])
+        return found
+
+    def _top(self, scored: Dict[str, Tuple[float, int]]) -> List[str]:
+        ranked = sorted(scored.items(), key=lambda item: (-item[1][0], item[1][1]))
+        return [skill for skill, _ in ranked[:self.max_keywords]]
+
+    def extract(self, job_description: str) -> List[str]:
+        return self._top(self.candidates(job_description))
+
+    async def aextract(self, job_description: str, ranking: str = "tfidf") -> List[str]:
+        # The lexicon scan and TF-IDF ranking are CPU work that grows with the JD; keep them off the loop.
+        scored = await asyncio.to_thread(self.candidates, job_description)
+        if ranking == "embedding" and scored and embedding.state.model is not None:
+            skills = list(scored)
+            vectors = await embedding.aembed_texts([job_description] + skills)
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+            similarity = (vectors[1:] @ vectors[0] + 1) / 2
+            scored = {skill: (scored[skill][0] * float(similarity[i]), scored[skill][1]) for i, skill in enumerate(skills)}
+        elif ranking not in ("tfidf", "embedding"):
+            raise ValueError(f"Unknown keyword ranking '{ranking}'. Expected 'tfidf' or 'embedding'.")
+        return self._top(scored)
+
+_extractor: Optional[LocalKeywordExtractor] = None
+
+def get_extractor() -> LocalKeywordExtractor:
+    global _extractor
+    if _extractor is None:
+        _extractor = LocalKeywordExtractor(load_lexicon(), config.LOCAL_KEYWORD_MAX)
+        logger.info(f"Loaded local keyword extractor with {len(_extractor.skills)} lexicon skills.")
+    return _extractor
+
+async def extract_keywords_async(job_description: str) -> List[str]:
+    return await get_extractor().aextract(job_description, config.LOCAL_KEYWORD_RANKING)
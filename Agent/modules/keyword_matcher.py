@@ -0,0 +1,189 @@
+import functools
+import re
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+
+# Surface forms treated as the same skill. Matching is case-insensitive except for
+# alphabetic forms of one or two letters ("Go", "JS", "ML") and the ordinary words in
+# CASE_SENSITIVE_FORMS, which must appear in the keyword's own, upper-case or capitalized
+# spelling so "go", "ai" or "graph node" in prose do not count.
+ALIAS_GROUPS: Tuple[Tuple[str, ...], ...] = (
+    ("javascript", "js", "ecmascript"),
+    ("typescript", "ts"),
+    ("kubernetes", "k8s"),
+    ("golang", "go"),
+    ("postgresql", "postgres", "psql"),
+    ("mongodb", "mongo"),
+    ("node.js", "nodejs", "node"),
+    ("react", "react.js", "reactjs"),
+    ("vue", "vue.js", "vuejs"),
+    ("next.js", "nextjs"),
+    ("c#", "csharp", "c sharp"),
+    ("c++", "cpp"),
+    ("amazon web services", "aws"),
+    ("google cloud platform", "gcp", "google cloud"),
+    ("microsoft azure", "azure"),
+    ("machine learning", "ml"),
+    ("artificial intelligence", "ai"),
+    ("natural language processing", "nlp"),
+    ("large language models", "large language model", "llm", "llms"),
+    ("scikit-learn", "sklearn"),
+    ("ci/cd", "cicd", "continuous integration"),
+    ("rest api", "rest apis", "restful api", "restful apis", "restful"),
+    ("user experience", "ux"),
+    ("user interface", "ui"),
+    # JDs usually drop the "Apache" from these project names.
+    ("apache spark", "spark"),
+    ("apache airflow", "airflow"),
+    ("apache flink", "flink"),
+    ("apache beam", "beam"),
+    ("kafka", "apache kafka"),
+    ("hadoop", "apache hadoop"),
+    ("hive", "apache hive"),
+)
+
+# Aliases that are also everyday English words.
+CASE_SENSITIVE_FORMS = frozenset({"node", "spark", "beam", "hive"})
+
+# Characters that continue a token: "Java" must not match inside "JavaScript", nor "C" inside "C++"/"C#".
+_WORD_CHARS = r"A-Za-z0-9_+#"
+_SEPARATOR = r"[\s\-]+"
+_SEPARATOR_RE = re.compile(_SEPARATOR)
+_WORD_CHAR_RE = re.compile(rf"[{_WORD_CHARS}]")
+_END = ""
+
+def normalize_form(text: str) -> str:
+    """Lower-case and collapse whitespace/hyphen runs so "Machine-Learning" == "machine learning"."""
+    return _SEPARATOR_RE.sub(" ", text.strip().lower())
+
+_CANONICAL = {normalize_form(form): normalize_form(group[0]) for group in ALIAS_GROUPS for form in group}
+
+def canonical_form(keyword: str) -> str:
+    """Normalized form with aliases folded onto their group's first entry ("K8s" -> "kubernetes")."""
+    form = normalize_form(keyword)
+    return _CANONICAL.get(form, form)
+
+def _is_case_sensitive(form: str) -> bool:
+    return (len(form) <= 2 and form.isalpha()) or form in CASE_SENSITIVE_FORMS
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Emit a prefix-factored alternation; greedy optionals make the longest form win."""
+    branches = []
+    for char in sorted(key for key in node if key != _END):
+        head = _SEPARATOR if char == " " else re.escape(char)
+        branches.append(head + _trie_pattern(node[char]))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+    return body
+
+def _build_trie(forms: Iterable[str]) -> Dict[str, dict]:
+    root: Dict[str, dict] = {}
+    for form in forms:
+        node = root
+        for char in form:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+    return root
+
+def _boundary_prefixes(trie: Dict[str, dict], form: str) -> List[str]:
+    """Shorter forms that ``form`` starts with and that end on a token boundary ("aws" in "aws lambda")."""
+    prefixes, node = [], trie
+    for end, char in enumerate(form[:-1], 1):
+        node = node[char]
+        if _END in node and not _WORD_CHAR_RE.match(form[end]):
+            prefixes.append(form[:end])
+    return prefixes
+
+class KeywordMatcher:
+    """Finds which of a fixed keyword list occur in a text with one compiled regex.
+
+    All keyword spellings and their aliases are folded into a single trie-shaped pattern
+    bounded by token lookarounds and tried at every token start, so overlapping mentions
+    are all reported: "AWS Lambda" counts for both "AWS Lambda" and "AWS". Build it once
+    per job description (see ``compile_matcher``) and reuse it across resumes.
+    """
+    def __init__(self, keywords: Sequence[str], alias_groups: Sequence[Sequence[str]] = ALIAS_GROUPS):
+        self.keywords = list(keywords)
+        aliases: Dict[str, Set[str]] = {}
+        for group in alias_groups:
+            forms = {normalize_form(form) for form in group}
+            for form in forms:
+                aliases.setdefault(form, set()).update(forms)
+        self._owners: Dict[str, Set[int]] = {}
+        self._trivial: Set[int] = set()
+        for i, keyword in enumerate(self.keywords):
+            form = normalize_form(keyword)
+            if not form:
+                self._trivial.add(i)
+                continue
+            for variant in aliases.get(form, {form}) | {form}:
+                self._owners.setdefault(variant, set()).add(i)
+        long_forms = [form for form in self._owners if not _is_case_sensitive(form)]
+        self._exact = {spelling for form in self._owners if _is_case_sensitive(form) for spelling in (form.upper(), form.capitalize())}
+        self._exact.update(keyword.strip() for keyword in self.keywords if _is_case_sensitive(normalize_form(keyword)))
+        trie = _build_trie(self._owners)
+        self._prefixes = {form: _boundary_prefixes(trie, form) for form in self._owners}
+        alternatives = []
+        if long_forms:
+            alternatives.append("(?i:" + _trie_pattern(_build_trie(long_forms)) + ")")
+        if self._exact:
+            alternatives.append(_trie_pattern(_build_trie(self._exact)))
+        self.pattern = self._scan = None
+        if alternatives:
+            self.pattern = re.compile(
+                rf"(?<![{_WORD_CHARS}])(?:{'|'.join(alternatives)})(?![{_WORD_CHARS}])"
+            )
+            # The same pattern as a lookahead: a zero-width match lets the scan resume at the
+            # next position instead of after the match, so a mention nested in a longer one is seen.
+            self._scan = re.compile(rf"(?=({self.pattern.pattern}))")
+
+    def _matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """``(start, end, form)`` for the longest form at each token start and every shorter form it begins with."""
+        for match in self._scan.finditer(text):
+            start, surface = match.start(), match.group(1)
+            form = normalize_form(surface)
+            yield start, start + len(surface), form
+            for prefix in self._prefixes.get(form, ()):
+                # Case-sensitive forms have no separators, so the prefix length carries over to the surface.
+                if not _is_case_sensitive(prefix) or surface[:len(prefix)] in self._exact:
+                    yield start, start + len(prefix), prefix
+
+    def found(self, text: str) -> Set[int]:
+        """Indices of keywords present in ``text``."""
+        found = set(self._trivial)
+        if self._scan is None:
+            return found
+        for _, _, form in self._matches(text):
+            found |= self._owners.get(form, set())
+            if len(found) == len(self.keywords):
+                break
+        return found
+
+    def spans(self, text: str) -> Dict[int, List[Tuple[int, int]]]:
+        """``(start, end)`` of every match in ``text``, per keyword index."""
+        spans: Dict[int, List[Tuple[int, int]]] = {}
+        if self._scan is None:
+            return spans
+        for start, end, form in self._matches(text):
+            for i in self._owners.get(form, ()):
+                spans.setdefault(i, []).append((start, end))
+        return spans
+
+    def occurrences(self, text: str) -> Dict[int, List[int]]:
+        """Start offsets of every match in ``text``, per keyword index."""
+        return {i: list(dict.fromkeys(start for start, _ in spans)) for i, spans in self.spans(text).items()}
+
+    def matched(self, text: str) -> List[str]:
+        found = self.found(text)
+        return [keyword for i, keyword in enumerate(self.keywords) if i in found]
+
+    def missing(self, text: str) -> List[str]:
+        found = self.found(text)
+        return [keyword for i, keyword in enumerate(self.keywords) if i not in found]
+
+@functools.lru_cache(maxsize=256)
+def compile_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Shared matcher per keyword tuple, so every resume scored against a JD reuses one compiled regex."""
+    return KeywordMatcher(keywords)
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);
+-- Running totals kept in step with every insert and delete, so writes and stats never scan the table.
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM responses;
+"""
+# Hits refresh an entry's LRU timestamp at most this often, so hot keys do not turn every read into a write.
+TOUCH_INTERVAL_SECONDS = 60.0
+
+def response_key(model: str, prompt: str, temperature: float, mime_type: Optional[str], max_tokens: int) -> str:
+    digest = hashlib.sha256()
+    for part in (model, prompt, repr(float(temperature)), mime_type or "", str(max_tokens)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class LLMResponseCache:
+    """Content-addressed Gemini response cache in a local SQLite file.
+
+    Entries expire after ``ttl_seconds`` and the least recently used ones are evicted once
+    the stored responses exceed ``max_bytes``. The database runs in WAL mode with a busy
+    timeout, so several uvicorn workers can read and write the same file concurrently.
+    Methods block; call them through ``asyncio.to_thread``.
+    """
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._initialize()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+        logger.info(f"Opened LLM response cache at {path} ({self.max_bytes} byte budget).")
+
+    def _initialize(self, attempts: int = 50):
+        # Switching to WAL takes an exclusive lock without honouring the busy timeout, so workers
+        # that open a fresh file at the same moment retry instead of failing startup.
+        for attempt in range(attempts):
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(_SCHEMA)
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or attempt == attempts - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+
+    def _count(self, namespace: str, name: str, amount: int = 1):
+        counters = self.counters.setdefault(namespace, {"hits": 0, "misses": 0, "writes": 0, "hit_bytes": 0})
+        counters[name] += amount
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT response, size, accessed_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None and now - row[2] >= TOUCH_INTERVAL_SECONDS:
+                    self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                logger.warning(f"LLM response cache read failed: {e}")
+                row = None
+            if row is None:
+                self._count(namespace, "misses")
+                return None
+            response, size, _ = row
+            self._count(namespace, "hits")
+            self._count(namespace, "hit_bytes", size)
+            return response
+
+    def put(self, namespace: str, key: str, response: str):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    replaced = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO responses (key, namespace, response, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, namespace, response, size, now + self.ttl_seconds, now)
+                    )
+                    if replaced is None:
+                        self._adjust_usage(1, size)
+                    else:
+                        self._adjust_usage(0, size - replaced[0])
+                    self._evict(now)
+                    self._conn.execute("COMMIT")
+                except sqlite3.Error:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                logger.warning(f"LLM response cache write failed: {e}")
+                return
+            self._count(namespace, "writes")
+
+    def _adjust_usage(self, entries: int, size: int):
+        self._conn.execute("UPDATE usage SET entries = entries + ?, bytes = bytes + ? WHERE id = 0", (entries, size))
+
+    def _evict(self, now: float):
+        evicted, expired_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE expires_at <= ?", (now,)
+        ).fetchone()
+        if evicted:
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._adjust_usage(-evicted, -expired_bytes)
+        excess = self._conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0] - self.max_bytes
+        if excess > 0:
+            stale, freed = [], 0
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+                stale.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+            self._adjust_usage(-len(stale), -freed)
+            evicted += len(stale)
+        self.evictions += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, stored_bytes = self._conn.execute("SELECT entries, bytes FROM usage WHERE id = 0").fetchone()
+        hits = sum(counters["hits"] for counters in self.counters.values())
+        misses = sum(counters["misses"] for counters in self.counters.values())
+        return {
+            "entries": entries,
+            "bytes": stored_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "hit_bytes": sum(counters["hit_bytes"] for counters in self.counters.values()),
+            "evictions": self.evictions,
+            "namespaces": {namespace: dict(counters) for namespace, counters in self.counters.items()},
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+from typing import List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENCODER_CONFIG_FILE = "encoder_config.json"
+
+class OnnxEncoder:
+    """CPU sentence encoder running an exported (optionally int8-quantized) ONNX graph.
+
+    Mirrors the ``SentenceTransformer.encode`` call used by the embedding module:
+    WordPiece tokenization, mean pooling over the attention mask and L2 normalization.
+    Produce the model directory with ``scripts/export_onnx.py``.
+    """
+    def __init__(self, model_dir: str, model_file: str, intra_op_threads: int = 0):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx requires the 'onnxruntime' and 'transformers' packages.") from e
+        with open(os.path.join(model_dir, ENCODER_CONFIG_FILE)) as f:
+            encoder_config = json.load(f)
+        self.max_seq_length = encoder_config["max_seq_length"]
+        self.dim = encoder_config["dim"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        logger.info(f"Loaded ONNX encoder {model_file} from {model_dir} (max_seq_length={self.max_seq_length}).")
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self._input_names if name in encoded}
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        # Length-sorted batches keep padding, and therefore wasted compute, to a minimum.
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            batch_indices = order[start:start + batch_size]
+            embeddings[batch_indices] = self._encode_batch([texts[i] for i in batch_indices])
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+from jinja2 import Template
+import config
+from modules import embedding
+from modules.keyword_extraction import REQUIREMENT_RE, get_extractor
+from modules.segmentation import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Sentences that are about the employer rather than the role are the first to go when a JD is trimmed.
+_BOILERPLATE_RE = re.compile(
+    r"\b(?:equal opportunity|benefits|perks|paid time off|401k|health insurance|about us|our mission|our culture|we offer|apply now|salary range)\b",
+    re.IGNORECASE,
+)
+
+_stats: Dict[str, Counter] = {}
+
+def count_tokens(text: str) -> int:
+    """Word/punctuation piece count, the same estimate chunking uses; close to Gemini's count for English."""
+    return estimate_tokens(text)
+
+def _sentence_weight(sentence: str, matcher) -> float:
+    weight = 1.0 + 2.0 * len(matcher.occurrences(sentence))
+    if REQUIREMENT_RE.search(sentence):
+        weight += 2.0
+    if _BOILERPLATE_RE.search(sentence):
+        weight -= 2.0
+    return weight
+
+def trim_text(text: str, max_tokens: int) -> str:
+    """Extractive summary of ``text`` within ``max_tokens``: the sentences naming the most
+    lexicon skills or reading like requirements are kept, in their original order."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Repeated sentences (boilerplate pasted twice, the same bullet in two sections) are kept once.
+    sentences = list(dict.fromkeys(embedding.get_segmenter().split(text)))
+    matcher = get_extractor().matcher
+    ranked = sorted(range(len(sentences)), key=lambda i: (-_sentence_weight(sentences[i], matcher), i))
+    kept, used = set(), 0
+    for i in ranked:
+        tokens = count_tokens(sentences[i])
+        if used + tokens <= max_tokens:
+            kept.add(i)
+            used += tokens
+    return "\n".join(sentences[i] for i in sorted(kept))
+
+async def dedupe_chunks(chunks: Sequence[Any], threshold: float) -> List[Any]:
+    """Drop chunks whose embedding is within ``threshold`` cosine similarity of a higher-ranked one."""
+    if len(chunks) < 2 or threshold >= 1.0 or embedding.state.model is None:
+        return list(chunks)
+    vectors = await embedding.aembed_texts([chunk.text for chunk in chunks])
+    kept: List[int] = []
+    for i in range(len(chunks)):
+        if not kept or float(np.max(vectors[kept] @ vectors[i])) < threshold:
+            kept.append(i)
+    return [chunks[i] for i in kept]
+
+def select_chunks(chunks: Sequence[Any], format_chunks: Callable[[List[Any]], str], max_tokens: int) -> List[Any]:
+    """Highest-scored chunks whose formatted context fits ``max_tokens``."""
+    selected: List[Any] = []
+    for chunk in sorted(chunks, key=lambda chunk: -chunk.score):
+        if count_tokens(format_chunks(selected + [chunk])) <= max_tokens:
+            selected.append(chunk)
+    return selected
+
+async def build_prompt(template: Template, call_site: str, job_description: Optional[str] = None,
+                       chunks: Optional[Sequence[Any]] = None, format_chunks: Optional[Callable[[List[Any]], str]] = None,
+                       **variables: Any) -> str:
+    """Render ``template`` within PROMPT_TOKEN_BUDGET.
+
+    Retrieved ``chunks`` (rendered as ``profile_context`` by ``format_chunks``) are
+    de-duplicated by embedding similarity, the ``job_description`` is trimmed to
+    PROMPT_JD_TOKEN_BUDGET (and to half of what the template leaves when there are chunks),
+    and the chunks fill the rest best score first. Tokens saved are logged per call site.
+
+    Other ``variables`` (e.g. the resume JSON an edit rewrites) are never trimmed: they count
+    against the budget, leaving less for the JD and chunks, but a prompt they alone push over
+    PROMPT_TOKEN_BUDGET is sent as is, with a warning.
+    """
+    fields = dict(variables)
+    if job_description is not None:
+        fields["job_description"] = job_description
+    if chunks is not None:
+        fields["profile_context"] = format_chunks(list(chunks))
+    original_tokens = count_tokens(template.render(**fields))
+
+    budget = config.PROMPT_TOKEN_BUDGET if config.PROMPT_TOKEN_BUDGET > 0 else float("inf")
+    available = budget - count_tokens(template.render(**{**fields, "job_description": "", "profile_context": ""}))
+    if job_description is not None:
+        # With retrieved context to fit as well, the JD may take at most half of what is left.
+        jd_budget = available / 2 if chunks else available
+        if config.PROMPT_JD_TOKEN_BUDGET > 0:
+            jd_budget = min(config.PROMPT_JD_TOKEN_BUDGET, jd_budget)
+        jd_budget = max(jd_budget, 0)
+        if count_tokens(job_description) > jd_budget:
+            # Segmenting and matching every sentence against the lexicon is CPU work; keep it off the loop.
+            fields["job_description"] = await asyncio.to_thread(trim_text, job_description, jd_budget)
+        available -= count_tokens(fields["job_description"])
+    dropped = 0
+    if chunks is not None:
+        unique = await dedupe_chunks(chunks, config.PROMPT_DEDUPE_SIMILARITY)
+        selected = select_chunks(unique, format_chunks, available)
+        dropped = len(chunks) - len(selected)
+        fields["profile_context"] = format_chunks(selected)
+    prompt = template.render(**fields)
+
+    final_tokens = count_tokens(prompt)
+    if final_tokens > budget:
+        logger.warning(f"Prompt '{call_site}' is {final_tokens} tokens, over the {config.PROMPT_TOKEN_BUDGET}-token budget; "
+                       f"only the job description and retrieved chunks are trimmed")
+    stats = _stats.setdefault(call_site, Counter())
+    stats.update(prompts=1, tokens_in=original_tokens, tokens_out=final_tokens, chunks_dropped=dropped,
+                 jd_trimmed=int(job_description is not None and fields["job_description"] != job_description))
+    logger.info(f"Prompt '{call_site}': {final_tokens} tokens, {original_tokens - final_tokens} saved "
+                f"({dropped} of {len(chunks or [])} chunks dropped)")
+    return prompt
+
+def get_stats() -> Dict[str, Dict[str, int]]:
+    return {call_site: {**counts, "tokens_saved": counts["tokens_in"] - counts["tokens_out"]} for call_site, counts in _stats.items()}
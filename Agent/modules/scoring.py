@@ -1,14 +1,25 @@
+import asyncio
 import logging
 import json
-from typing import List
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 import httpx
+import numpy as np
 from jinja2 import Template
 
-from modules import embedding
-import llm_client, schemas
+from modules import embedding, keyword_extraction, prompt_budget
+from modules.keyword_cache import KeywordCache
+from modules.cache import LRUCache, content_hash
+from modules.keyword_matcher import canonical_form, compile_matcher
+import config, llm_client, schemas
 
 logger = logging.getLogger(__name__)
 
+# Part of the keyword/suggestion cache keys; bump whenever the matching template changes.
+KEYWORD_PROMPT_VERSION = "2"
+SUGGESTION_PROMPT_VERSION = "1"
+PROFILE_SUGGESTION_PROMPT_VERSION = "1"
+
 KEYWORD_EXTRACTION_TEMPLATE = Template("""You are an expert ATS (Applicant Tracking System) analyzer. Your task is to extract the most important skills, technologies, and keywords from a job description that an ATS would look for in a resume.
 
 **Job Description:**
@@ -48,40 +59,227 @@ SUGGESTION_TEMPLATE = Template("""You are a helpful career coach. A candidate is
 
 Provide your suggestions now:""")
 
-def identify_missing_keywords(required: List[str], resume_text: str) -> List[str]:
-    resume_lower = resume_text.lower()
-    return [skill for skill in required if skill.lower() not in resume_lower]
+# Profile-oriented counterpart of SUGGESTION_TEMPLATE; it sees only the keywords so the
+# answer can be cached and then tied to each user's profile by personalize_suggestions.
+PROFILE_SUGGESTION_TEMPLATE = Template("""You are an expert career consultant helping a user improve their professional profile. Based on an ATS analysis, the user is missing these key skills/technologies: {{ skills_list }}.
 
-async def calculate_composite_score(request: schemas.ScoreRequest, client: httpx.AsyncClient) -> schemas.ScoreResponse:
-    semantic_score = embedding.compute_semantic_score(
-        request.job_description, request.resume_text
-    )
-    prompt = KEYWORD_EXTRACTION_TEMPLATE.render(job_description=request.job_description)
+**Instructions:**
+1. Suggest specific, actionable ways to build and demonstrate these skills in their professional profile
+2. Cover skill development (courses, certifications, training) and experience building (hands-on practice, projects)
+3. Suggest achievements and experiences worth adding to the profile, and how to position it for roles needing these skills
+4. Provide 5-7 concrete suggestions total; focus on PROFILE improvements, not resume edits
+
+**Required JSON Format:**
+{
+  "suggestions": [
+    "suggestion 1",
+    "suggestion 2",
+    "suggestion 3"
+  ]
+}
+
+Provide your suggestions now:""")
+
+# kind -> (template, prompt version, prompt-budget call site)
+_SUGGESTION_PROMPTS = {
+    "resume": (SUGGESTION_TEMPLATE, SUGGESTION_PROMPT_VERSION, "suggestions"),
+    "profile": (PROFILE_SUGGESTION_TEMPLATE, PROFILE_SUGGESTION_PROMPT_VERSION, "profile_suggestions_cached"),
+}
+
+_keyword_cache: Optional[KeywordCache] = None
+
+def get_keyword_cache() -> Optional[KeywordCache]:
+    global _keyword_cache
+    if config.KEYWORD_CACHE_ENABLED and _keyword_cache is None:
+        _keyword_cache = KeywordCache(
+            config.KEYWORD_CACHE_MAX_ENTRIES, config.KEYWORD_CACHE_TTL_SECONDS,
+            config.KEYWORD_CACHE_PERSISTENT, config.KEYWORD_CACHE_COLLECTION
+        )
+    return _keyword_cache
+
+_suggestion_cache: Optional[LRUCache] = None
+
+def get_suggestion_cache() -> Optional[LRUCache]:
+    global _suggestion_cache
+    if config.SUGGESTION_CACHE_ENABLED and _suggestion_cache is None:
+        _suggestion_cache = LRUCache(config.SUGGESTION_CACHE_MAX_ENTRIES, ttl_seconds=config.SUGGESTION_CACHE_TTL_SECONDS)
+    return _suggestion_cache
+
+def get_stats() -> Dict[str, Any]:
+    return {
+        "keyword_cache": _keyword_cache.stats() if _keyword_cache else None,
+        "suggestion_cache": _suggestion_cache.stats() if _suggestion_cache is not None else None,
+    }
+
+async def extract_required_keywords(job_description: str, client: httpx.AsyncClient,
+                                    extractor: Optional[str] = None) -> List[str]:
+    """Skills an ATS would look for in ``job_description``.
+
+    ``extractor`` ("llm" or "local", default KEYWORD_EXTRACTOR) picks Gemini, served from the
+    keyword cache when possible, or the offline lexicon extractor, which is also the fallback
+    when the LLM call fails or returns no skills and KEYWORD_LLM_FALLBACK is "local".
+    """
+    if (extractor or config.KEYWORD_EXTRACTOR) == "local":
+        return await keyword_extraction.extract_keywords_async(job_description)
+    cache = get_keyword_cache()
+    key = KeywordCache.key(job_description, config.GEMINI_MODEL, KEYWORD_PROMPT_VERSION) if cache else None
+    if cache:
+        cached = await cache.get(key)
+        if cached is not None:
+            return cached
+    prompt = await prompt_budget.build_prompt(KEYWORD_EXTRACTION_TEMPLATE, "keywords", job_description=job_description)
     try:
-        response_text = await llm_client.invoke_gemini(client, prompt, enforce_json=True)
+        response_text = await llm_client.invoke_gemini(client, prompt, enforce_json=True, cache_namespace="keywords")
         required_keywords = json.loads(response_text).get("skills", [])
-    except (json.JSONDecodeError, llm_client.LLMError):
-        required_keywords = []
+    except (json.JSONDecodeError, llm_client.LLMError) as e:
+        required_keywords, failure = [], e
+    else:
+        failure = "no skills returned"
+    if not required_keywords:
+        # An empty list would score every resume 1.0 on keywords, so it is never cached.
+        if config.KEYWORD_LLM_FALLBACK == "local":
+            logger.warning(f"LLM keyword extraction failed, using the local extractor: {failure}")
+            return await keyword_extraction.extract_keywords_async(job_description)
+        return []
+    if cache:
+        await cache.put(key, required_keywords, job_description)
+    return required_keywords
+
+def identify_missing_keywords(required: List[str], resume_text: str) -> List[str]:
+    return compile_matcher(tuple(required)).missing(resume_text)
+
+def _compose_score(semantic_score: float, required_keywords: List[str], resume_text: str) -> Dict[str, Any]:
     if not required_keywords:
         keyword_score = 1.0
         missing_keywords = []
     else:
-        missing_keywords = identify_missing_keywords(required_keywords, request.resume_text)
+        missing_keywords = identify_missing_keywords(required_keywords, resume_text)
         keyword_score = (len(required_keywords) - len(missing_keywords)) / len(required_keywords)
     final_score = (semantic_score * 0.4) + (keyword_score * 0.6)
-    return schemas.ScoreResponse(
-        final_score=round(final_score, 3),
-        semantic_score=round(semantic_score, 3),
-        keyword_score=round(keyword_score, 3),
-        missing_keywords=missing_keywords,
+    return {
+        "final_score": round(final_score, 3),
+        "semantic_score": round(semantic_score, 3),
+        "keyword_score": round(keyword_score, 3),
+        "missing_keywords": missing_keywords,
+    }
+
+async def _timed(name: str, coro, timings: Dict[str, float]):
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+async def calculate_composite_score(request: schemas.ScoreRequest, client: httpx.AsyncClient) -> schemas.ScoreResponse:
+    """Score a resume against a JD; embedding (off-loop) and LLM keyword extraction run concurrently."""
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    semantic_score, required_keywords = await asyncio.gather(
+        _timed("semantic", embedding.compute_semantic_score_async(request.job_description, request.resume_text), timings),
+        _timed("keywords", extract_required_keywords(request.job_description, client, request.keyword_extractor), timings),
     )
+    stage_started = time.perf_counter()
+    result = _compose_score(semantic_score, required_keywords, request.resume_text)
+    timings["match_ms"] = round((time.perf_counter() - stage_started) * 1000, 1)
+    timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    result["debug"] = timings
+    return schemas.ScoreResponse(**result)
 
-async def get_suggestions(request: schemas.SuggestionRequest, client: httpx.AsyncClient) -> schemas.SuggestionResponse:
-    prompt = SUGGESTION_TEMPLATE.render(skills_list=", ".join(request.missing_keywords))
+def _compose_block(block, job_descriptions, resume_texts, semantic, jd_rows, resume_cols, keywords_by_jd):
+    return [schemas.BatchScoreResult(
+        job_index=i, resume_index=j,
+        **_compose_score(float(semantic[jd_rows[job_descriptions[i]], resume_cols[resume_texts[j]]]),
+                         keywords_by_jd[job_descriptions[i]], resume_texts[j])
+    ) for i, j in block]
+
+async def score_batch(request: schemas.BatchScoreRequest, client: httpx.AsyncClient) -> AsyncIterator[schemas.BatchScoreResult]:
+    """Yield a result for every (job description, resume) pair, one block at a time.
+
+    Keywords are extracted once per distinct JD. Each block of BATCH_SCORE_BLOCK_SIZE pairs
+    is embedded in one call and scored as a single similarity matrix while the block's LLM
+    extractions run, so memory stays bounded however large the batch is.
+    """
+    job_descriptions, resume_texts = request.job_descriptions, request.resume_texts
+    pairs = [(i, j) for i in range(len(job_descriptions)) for j in range(len(resume_texts))]
+    keywords_by_jd: Dict[str, List[str]] = {}
+    for start in range(0, len(pairs), config.BATCH_SCORE_BLOCK_SIZE):
+        block = pairs[start:start + config.BATCH_SCORE_BLOCK_SIZE]
+        block_jds = list(dict.fromkeys(job_descriptions[i] for i, _ in block))
+        block_resumes = list(dict.fromkeys(resume_texts[j] for _, j in block))
+        pending = [jd for jd in block_jds if jd not in keywords_by_jd]
+        semantic, extracted = await asyncio.gather(
+            embedding.compute_semantic_matrix_async(block_jds, block_resumes),
+            asyncio.gather(*(extract_required_keywords(jd, client, request.keyword_extractor) for jd in pending)),
+        )
+        keywords_by_jd.update(zip(pending, extracted))
+        results = await asyncio.to_thread(
+            _compose_block, block, job_descriptions, resume_texts, semantic,
+            {jd: row for row, jd in enumerate(block_jds)}, {text: col for col, text in enumerate(block_resumes)},
+            keywords_by_jd
+        )
+        for result in results:
+            yield result
+
+def canonical_keyword_set(keywords: List[str]) -> List[str]:
+    """Sorted keywords with case, spacing and aliases folded, so equivalent sets share one cache entry."""
+    by_form: Dict[str, str] = {}
+    for keyword in keywords:
+        form = canonical_form(keyword)
+        if form:
+            by_form.setdefault(form, keyword.strip())
+    return [by_form[form] for form in sorted(by_form)]
+
+async def get_generic_suggestions(missing_keywords: List[str], client: httpx.AsyncClient, kind: str = "resume") -> Optional[List[str]]:
+    """Generic suggestions for a keyword set, cached by the canonical set; None if Gemini fails.
+
+    ``kind`` picks resume advice (SUGGESTION_TEMPLATE) or profile advice (PROFILE_SUGGESTION_TEMPLATE).
+    """
+    template, version, call_site = _SUGGESTION_PROMPTS[kind]
+    keywords = canonical_keyword_set(missing_keywords)
+    cache = get_suggestion_cache()
+    key = content_hash(config.GEMINI_MODEL, kind, version, *(canonical_form(keyword) for keyword in keywords))
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return list(cached)
+    prompt = await prompt_budget.build_prompt(template, call_site, skills_list=", ".join(keywords))
     try:
-        response_text = await llm_client.invoke_gemini(client, prompt, enforce_json=True)
+        response_text = await llm_client.invoke_gemini(client, prompt, enforce_json=True, cache_namespace="suggestions")
         suggestions = json.loads(response_text).get("suggestions", [])
     except (json.JSONDecodeError, llm_client.LLMError) as e:
         logger.error(f"Failed to get suggestions: {e}")
+        return None
+    if cache is not None and suggestions:
+        cache.put(key, tuple(suggestions))
+    return suggestions
+
+async def get_suggestions(request: schemas.SuggestionRequest, client: httpx.AsyncClient) -> schemas.SuggestionResponse:
+    suggestions = await get_generic_suggestions(request.missing_keywords, client)
+    if suggestions is None:
         suggestions = ["Could not generate suggestions at this time."]
-    return schemas.SuggestionResponse(suggestions=suggestions)
\ No newline at end of file
+    return schemas.SuggestionResponse(suggestions=suggestions)
+
+async def personalize_suggestions(suggestions: List[str], profile_chunks: List[Dict[str, Any]]) -> List[str]:
+    """Tie generic suggestions to the user's own profile without another LLM call.
+
+    Each suggestion is paired with its most similar retrieved profile chunk (embeddings are
+    local and cached) and close matches get a pointer to that experience. Contact fields
+    are never cited, and the LLM's order of suggestions is kept.
+    """
+    profile_chunks = [chunk for chunk in profile_chunks if chunk.get("source_type") not in embedding.ESSENTIAL_SOURCE_TYPES]
+    if not suggestions or not profile_chunks:
+        return suggestions
+    chunk_texts = [chunk["text"] for chunk in profile_chunks]
+    vectors = await embedding.aembed_texts(suggestions + chunk_texts)
+    vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    similarity = (vectors[:len(suggestions)] @ vectors[len(suggestions):].T + 1) / 2
+    personalized = []
+    for i, suggestion in enumerate(suggestions):
+        best = int(similarity[i].argmax())
+        if similarity[i, best] >= config.SUGGESTION_PERSONALIZATION_MIN_SIMILARITY:
+            chunk = profile_chunks[best]
+            snippet = " ".join(chunk["text"].split()[:18])
+            source = chunk.get("source_type", "profile")
+            suggestion = f"{suggestion} Build on what your {source} already shows: \"{snippet}...\""
+        personalized.append(suggestion)
+    return personalized
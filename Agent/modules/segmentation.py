@@ -0,0 +1,113 @@
+import logging
+import re
+from typing import Iterator, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+class Chunk(NamedTuple):
+    text: str
+    word_count: int
+    # Word/punctuation pieces: a cheap lower bound on the encoder's WordPiece token count.
+    token_count: int
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+_BULLET_RE = re.compile(r"^\s*(?:[•▪●◦‣∙○■□➢➤►✓✔*\-–—]|\d{1,2}[.)])\s+")
+_INLINE_BULLET_RE = re.compile(r"\s+[•▪●◦‣∙■➢➤►]\s+")
+# Sentence-final punctuation (plus closing quotes/brackets) followed by whitespace and
+# something that can start a sentence.
+_BOUNDARY_RE = re.compile(r"[.!?][\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+_INITIALISM_RE = re.compile(r"(?:[A-Za-z]\.){2,}$")
+
+ABBREVIATIONS = frozenset({
+    "e.g", "i.e", "etc", "vs", "approx", "incl", "dept", "est", "no", "nos", "fig",
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt",
+    "inc", "ltd", "co", "corp", "llc", "pvt", "plc", "intl",
+    "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    "b.sc", "m.sc", "b.tech", "m.tech", "b.e", "m.e", "b.a", "m.a", "b.s", "m.s", "ph.d", "m.b.a",
+    # Single letters are listed explicitly; otherwise "plan A. Then" ends a sentence.
+    "v", "p", "pp",
+})
+
+class RuleBasedSegmenter:
+    """Regex sentence splitter tuned for resume text.
+
+    Line breaks and bullet markers always end a segment; within a line, sentences end at
+    ``.``, ``!`` or ``?`` unless the preceding word is a known abbreviation, degree or
+    initialism of two or more letters (``e.g.``, ``Sr.``, ``B.Tech.``, ``U.S.``). Needs no model data.
+    """
+    name = "rule"
+
+    def prepare(self):
+        pass
+
+    def _split_line(self, line: str) -> Iterator[str]:
+        start = 0
+        for match in _BOUNDARY_RE.finditer(line):
+            end = match.start() + 1
+            last_word = line[start:end].rsplit(None, 1)[-1].lstrip("\"'([")
+            stem = last_word[:-1].lower()
+            if stem in ABBREVIATIONS or _INITIALISM_RE.match(last_word):
+                continue
+            sentence = line[start:match.end()].strip()
+            if sentence:
+                yield sentence
+            start = match.end()
+        tail = line[start:].strip()
+        if tail:
+            yield tail
+
+    def split(self, text: str) -> Iterator[str]:
+        for line in text.splitlines():
+            for item in _INLINE_BULLET_RE.split(line):
+                item = _BULLET_RE.sub("", item, count=1).strip()
+                if item:
+                    yield from self._split_line(item)
+
+class NltkSegmenter:
+    """NLTK punkt sentence tokenizer; punkt data is resolved (and downloaded) once, lazily."""
+    name = "nltk"
+
+    def __init__(self):
+        self._ready = False
+
+    def prepare(self):
+        if self._ready:
+            return
+        import nltk
+        try:
+            nltk.data.find("tokenizers/punkt_tab")
+        except LookupError:
+            logger.info("Downloading NLTK 'punkt_tab' tokenizer...")
+            nltk.download("punkt_tab", quiet=True)
+        self._ready = True
+
+    def split(self, text: str) -> List[str]:
+        self.prepare()
+        import nltk
+        return nltk.sent_tokenize(text)
+
+def create_segmenter(name: str):
+    if name == "rule":
+        return RuleBasedSegmenter()
+    if name == "nltk":
+        return NltkSegmenter()
+    raise ValueError(f"Unknown chunk segmenter '{name}'. Expected 'rule' or 'nltk'.")
+
+def chunk_sentences(sentences, max_words: int) -> Iterator[Chunk]:
+    """Greedily pack sentences into chunks of at most ``max_words`` words (a longer sentence stays whole)."""
+    current, current_words = [], 0
+    for sentence in sentences:
+        words = len(sentence.split())
+        if current_words + words > max_words and current:
+            text = " ".join(current)
+            yield Chunk(text, current_words, estimate_tokens(text))
+            current, current_words = [], 0
+        current.append(sentence)
+        current_words += words
+    if current:
+        text = " ".join(current)
+        yield Chunk(text, current_words, estimate_tokens(text))
@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Optional
+import numpy as np
+from bson.binary import Binary
+
+STORAGE_FORMATS = ("array", "float32", "float16", "int8")
+
+# float32 and int8 use the BSON vector subtype (9) so Atlas can still index them; its
+# payload is a dtype byte, a padding byte, then little-endian values. Atlas has no
+# float16 vector type, so float16 uses a user-defined subtype and is local-search only.
+VECTOR_SUBTYPE = 9
+FLOAT16_SUBTYPE = 0x80
+_FLOAT32_DTYPE = 0x27
+_INT8_DTYPE = 0x03
+_HEADER_BYTES = 2
+
+def encode_embedding(vector: np.ndarray, storage_format: str) -> Dict[str, Any]:
+    """Return the chunk fields that store ``vector`` in ``storage_format``.
+
+    ``int8`` stores a symmetric per-vector scale in ``embedding_scale``.
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    if storage_format == "array":
+        return {"embedding": vector.tolist()}
+    if storage_format == "float32":
+        payload = bytes((_FLOAT32_DTYPE, 0)) + vector.astype("<f4").tobytes()
+        return {"embedding": Binary(payload, VECTOR_SUBTYPE)}
+    if storage_format == "float16":
+        return {"embedding": Binary(vector.astype("<f2").tobytes(), FLOAT16_SUBTYPE)}
+    if storage_format == "int8":
+        scale = float(np.abs(vector).max()) / 127.0 or 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return {"embedding": Binary(bytes((_INT8_DTYPE, 0)) + quantized.tobytes(), VECTOR_SUBTYPE), "embedding_scale": scale}
+    raise ValueError(f"Unknown embedding storage format '{storage_format}'. Expected one of {STORAGE_FORMATS}.")
+
+def storage_format_of(value: Any) -> str:
+    if isinstance(value, Binary):
+        if value.subtype == FLOAT16_SUBTYPE:
+            return "float16"
+        if value.subtype == VECTOR_SUBTYPE and len(value) >= _HEADER_BYTES:
+            if value[0] == _FLOAT32_DTYPE:
+                return "float32"
+            if value[0] == _INT8_DTYPE:
+                return "int8"
+        raise ValueError(f"Unsupported embedding binary (subtype {value.subtype}).")
+    return "array"
+
+def decode_embedding(value: Any, scale: Optional[float] = None) -> np.ndarray:
+    """Decode a stored embedding to float32. Binary float32 is a zero-copy, read-only view."""
+    storage_format = storage_format_of(value)
+    if storage_format == "float32":
+        return np.frombuffer(value, dtype="<f4", offset=_HEADER_BYTES)
+    if storage_format == "float16":
+        return np.frombuffer(value, dtype="<f2").astype(np.float32)
+    if storage_format == "int8":
+        quantized = np.frombuffer(value, dtype=np.int8, offset=_HEADER_BYTES)
+        return quantized.astype(np.float32) * np.float32(scale if scale is not None else 1.0)
+    return np.asarray(value, dtype=np.float32)
+
+def decode_matrix(docs: List[Dict[str, Any]], dim: int) -> np.ndarray:
+    """Stack the ``embedding`` fields of chunk docs into one contiguous float32 matrix."""
+    if not docs:
+        return np.empty((0, dim), dtype=np.float32)
+    values = [doc["embedding"] for doc in docs]
+    if all(isinstance(value, Binary) and value.subtype == VECTOR_SUBTYPE and value[0] == _FLOAT32_DTYPE for value in values):
+        payload = b"".join(memoryview(value)[_HEADER_BYTES:] for value in values)
+        return np.frombuffer(payload, dtype="<f4").reshape(len(values), dim).astype(np.float32, copy=False)
+    matrix = np.empty((len(values), dim), dtype=np.float32)
+    for i, doc in enumerate(docs):
+        matrix[i] = decode_embedding(doc["embedding"], doc.get("embedding_scale"))
+    return matrix
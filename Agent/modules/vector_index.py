@@ -0,0 +1,116 @@
+import logging
+import time
+from typing import Any, Dict, List
+import numpy as np
+from pymongo.collection import Collection
+import config
+from modules.cache import LRUCache
+from modules.vector_codec import decode_matrix
+
+logger = logging.getLogger(__name__)
+
+class AtlasVectorSearchBackend:
+    """Retrieval through MongoDB Atlas ``$vectorSearch``."""
+    name = "atlas"
+
+    def __init__(self, index_name: str):
+        self.index_name = index_name
+
+    def search(self, collection: Collection, user_id: str, namespace: str, query_vector: np.ndarray,
+               top_k: int, version: Any = None) -> List[Dict[str, Any]]:
+        pipeline = [
+            {"$vectorSearch": {
+                "index": self.index_name, "path": "embedding", "queryVector": query_vector.tolist(),
+                "numCandidates": top_k * 10, "limit": top_k,
+                "filter": {"user_id": user_id, "index_namespace": namespace},
+            }},
+            {"$project": {
+                "chunk_id": "$_id", "text": 1, "source_type": 1, "source_id": 1,
+                "score": {"$meta": "vectorSearchScore"}
+            }}
+        ]
+        return list(collection.aggregate(pipeline))
+
+    def invalidate(self, user_id: str):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "index": self.index_name}
+
+class _UserMatrix:
+    __slots__ = ("version", "chunk_ids", "texts", "source_types", "source_ids", "matrix")
+
+    def __init__(self, version: Any, docs: List[Dict[str, Any]]):
+        self.version = version
+        self.chunk_ids = [str(doc["_id"]) for doc in docs]
+        self.texts = [doc.get("text", "") for doc in docs]
+        self.source_types = [doc.get("source_type", "") for doc in docs]
+        self.source_ids = [doc.get("source_id", "") for doc in docs]
+        self.matrix = decode_matrix(docs, config.EMBEDDING_DIM)
+
+class LocalVectorIndex:
+    """Exact in-process search over each user's chunk embeddings.
+
+    A user's chunks are loaded lazily into one contiguous float32 matrix and kept in an
+    LRU. ``version`` (the user's ``embeddings_last_updated``) is compared on every query
+    so a reindex from any worker invalidates the cached matrix. Scores use the same
+    scale as Atlas cosine ``vectorSearchScore``: ``(1 + cosine) / 2``.
+    """
+    name = "local"
+
+    def __init__(self, max_users: int):
+        self._entries = LRUCache(max_users)
+        self.loads = 0
+        self.load_ms = 0.0
+
+    def _get_entry(self, collection: Collection, user_id: str, namespace: str, version: Any) -> _UserMatrix:
+        key = (user_id, namespace)
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version:
+            started = time.perf_counter()
+            docs = list(collection.find(
+                {"user_id": user_id, "index_namespace": namespace, "embedding": {"$exists": True}},
+                {"_id": 1, "text": 1, "source_type": 1, "source_id": 1, "embedding": 1, "embedding_scale": 1}
+            ))
+            entry = _UserMatrix(version, docs)
+            self._entries.put(key, entry)
+            self.loads += 1
+            self.load_ms += (time.perf_counter() - started) * 1000
+        return entry
+
+    def search(self, collection: Collection, user_id: str, namespace: str, query_vector: np.ndarray,
+               top_k: int, version: Any = None) -> List[Dict[str, Any]]:
+        entry = self._get_entry(collection, user_id, namespace, version)
+        if not entry.chunk_ids or top_k <= 0:
+            return []
+        scores = entry.matrix @ np.asarray(query_vector, dtype=np.float32)
+        if top_k < scores.shape[0]:
+            candidates = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            candidates = np.arange(scores.shape[0])
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [{
+            "chunk_id": entry.chunk_ids[i], "text": entry.texts[i],
+            "source_type": entry.source_types[i], "source_id": entry.source_ids[i],
+            "score": float(np.clip((1.0 + scores[i]) / 2.0, 0.0, 1.0)),
+        } for i in order]
+
+    def invalidate(self, user_id: str):
+        for key in self._entries.keys():
+            if key[0] == user_id:
+                self._entries.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "users": self._entries.stats(),
+            "loads": self.loads,
+            "avg_load_ms": round(self.load_ms / self.loads, 2) if self.loads else 0.0,
+        }
+
+def create_backend(name: str):
+    if name == "atlas":
+        return AtlasVectorSearchBackend(config.VECTOR_INDEX_NAME)
+    if name == "local":
+        return LocalVectorIndex(config.LOCAL_INDEX_MAX_USERS)
+    raise ValueError(f"Unknown retrieval backend '{name}'. Expected 'atlas' or 'local'.")
@@ -8,17 +8,76 @@ from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain.tools import BaseTool, tool
 from langchain.schema import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_google_genai import ChatGoogleGenerativeAI
+from jinja2 import Template
 from pydantic import BaseModel, Field
 import config
+import llm_client
 import schemas
-from modules import embedding, scoring, generation
+from gemini_chat import GeminiChatModel
+from modules import embedding, scoring, generation, prompt_budget
 from llm_client import LLMError
 logger = logging.getLogger(__name__)
 conversation_store: Dict[str, schemas.ConversationState] = {}
 import pickle
 import os
 CONVERSATION_BACKUP_FILE = "conversation_backup.pkl"
+DEFAULT_PROFILE_SUGGESTIONS = (
+    "Take courses or get certifications in the missing technologies to strengthen your profile",
+    "Build personal projects using the missing skills and add them to your experience",
+    "Update your profile with specific achievements involving these technologies",
+    "Consider freelance work or volunteering to gain experience with these tools",
+    "Join professional communities and contribute to open-source projects in these areas"
+)
+EDIT_RESUME_TEMPLATE = Template("""
+You are an expert resume editor. You have a resume in JSON format and specific edit instructions.
+Apply the edit instructions precisely and return ONLY the updated JSON resume.
+
+Current Resume JSON:
+{{ current_resume_json }}
+
+Edit Instructions:
+{{ edit_instructions }}
+
+Job Description (for context):
+{{ job_description }}
+
+CRITICAL RULES:
+1. Return ONLY valid JSON with the EXACT same structure
+2. If asked to remove a "summary" section, remove any field that contains summary/profile/objective content
+3. Look for summary content in common locations like:
+   - resume.basics.summary
+   - resume.summary  
+   - Any field with "summary", "profile", "objective", "about" in the key name
+4. When removing sections, delete the entire field/key completely
+5. If adding content, ensure it fits the existing structure and is relevant to the job description
+6. If modifying content, improve it while following the instructions precisely
+7. Preserve all other content exactly as provided
+
+IMPORTANT: If the resume has nested structure like {"resume": {"basics": {"summary": "..."}}}, 
+make sure to preserve the nesting and only modify the requested content within that structure.
+
+Updated Resume JSON:
+""")
+PROFILE_SUGGESTION_TEMPLATE = Template("""You are an expert career consultant helping a user improve their professional profile. Based on the ATS analysis, the user is missing these key skills/technologies: {{ missing_keywords }}.
+User's Current Profile Context:
+{{ profile_context }}
+{% if job_description %}Target Job Requirements: {{ job_description }}{% endif %}
+Generate specific, actionable suggestions for improving their professional profile to include the missing skills. Focus on:
+1. Skill Development (courses, certifications, training)
+2. Experience Building (hands-on practice, projects)
+3. Profile Content (achievements, experiences to add)
+4. Industry Alignment (positioning for target role)
+Return your response as a JSON array of strings, where each string is a complete, actionable suggestion. Include 5-7 suggestions that are personalized and specific.
+Example format:
+[
+  "Take a Docker certification course to demonstrate containerization skills and add it to your professional development section",
+  "Build a personal project using Kubernetes and deploy it to showcase orchestration experience in your portfolio"
+]
+Focus on PROFILE improvements, not resume edits. Be specific and actionable.""")
+def format_profile_context(chunks: List[schemas.ChunkItem]) -> str:
+    if not chunks:
+        return "No existing profile data found."
+    return "\n".join(f"- {chunk.text}" for chunk in chunks)
 def save_conversation_store():
     """Save the current conversation store to a backup file."""
     try:
@@ -104,7 +163,7 @@ def get_resume_suggestions(user_id: str = None, missing_keywords: List[str] = No
         logger.error(f"Error getting suggestions: {e}")
         return f"Error getting suggestions: {str(e)}"
 @tool
-def edit_resume_section(edit_instructions: str, job_description: str, user_id: str = None) -> str:
+async def edit_resume_section(edit_instructions: str, job_description: str, user_id: str = None) -> str:
     """Edit a specific section of an existing resume based on user instructions and job requirements."""
     try:
         current_resume = None
@@ -118,43 +177,12 @@ def edit_resume_section(edit_instructions: str, job_description: str, user_id: s
         if not current_resume:
             return "Error: No current resume found. Please generate a resume first."
         current_resume_json = json.dumps(current_resume)
-        edit_prompt = f"""
-You are an expert resume editor. You have a resume in JSON format and specific edit instructions.
-Apply the edit instructions precisely and return ONLY the updated JSON resume.
-
-Current Resume JSON:
-{current_resume_json}
-
-Edit Instructions:
-{edit_instructions}
-
-Job Description (for context):
-{job_description}
-
-CRITICAL RULES:
-1. Return ONLY valid JSON with the EXACT same structure
-2. If asked to remove a "summary" section, remove any field that contains summary/profile/objective content
-3. Look for summary content in common locations like:
-   - resume.basics.summary
-   - resume.summary  
-   - Any field with "summary", "profile", "objective", "about" in the key name
-4. When removing sections, delete the entire field/key completely
-5. If adding content, ensure it fits the existing structure and is relevant to the job description
-6. If modifying content, improve it while following the instructions precisely
-7. Preserve all other content exactly as provided
-
-IMPORTANT: If the resume has nested structure like {{"resume": {{"basics": {{"summary": "..."}}}}}}, 
-make sure to preserve the nesting and only modify the requested content within that structure.
-
-Updated Resume JSON:
-"""
-        llm = ChatGoogleGenerativeAI(
-            model=config.GEMINI_MODEL,
-            google_api_key=config.GEMINI_API_KEY,
-            temperature=0.3
+        # Only the JD is trimmed: the model must return the whole resume, so it is always sent in full.
+        edit_prompt = await prompt_budget.build_prompt(
+            EDIT_RESUME_TEMPLATE, "edit_resume", job_description=job_description,
+            current_resume_json=current_resume_json, edit_instructions=edit_instructions
         )
-        response = llm.invoke(edit_prompt)
-        edited_resume = response.content.strip()
+        edited_resume = await llm_client.invoke_gemini(llm_client.get_http_client(), edit_prompt, enforce_json=True, temperature=0.3)
         if edited_resume.startswith("```json"):
             edited_resume = edited_resume[7:]
         if edited_resume.endswith("```"):
@@ -191,12 +219,7 @@ def check_user_data(user_id: str) -> str:
 class ResumeAgent:
     def __init__(self, http_client: httpx.AsyncClient):
         self.http_client = http_client
-        self.llm = ChatGoogleGenerativeAI(
-            model=config.GEMINI_MODEL,
-            google_api_key=config.GEMINI_API_KEY,
-            temperature=config.GENERATION_TEMPERATURE,
-            max_tokens=config.GENERATION_MAX_TOKENS
-        )
+        self.llm = GeminiChatModel(http_client=http_client)
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are CVForge.ai, an expert AI resume consultant that takes immediate action. You help users create personalized, ATS-optimized resumes and provide career advice.
 Your capabilities include:
@@ -569,7 +592,7 @@ Be helpful, professional, and provide actionable advice. Format your responses c
             raise
     async def calculate_full_ats_score_async(self, resume_text: str, job_description: str) -> schemas.ScoreResponse:
         try:
-            self.ensure_embedding_model_loaded()
+            await self.ensure_embedding_model_loaded()
             request = schemas.ScoreRequest(
                 job_description=job_description,
                 resume_text=resume_text
@@ -585,50 +608,39 @@ Be helpful, professional, and provide actionable advice. Format your responses c
         except Exception as e:
             logger.error(f"Error in async suggestions: {e}")
             raise
-    def ensure_embedding_model_loaded(self):
+    async def ensure_embedding_model_loaded(self):
         """Ensure the embedding model is loaded before use."""
         try:
             from modules import embedding
-            embedding.init_db()
-            embedding.load_model()
+            if embedding.state.db is None:
+                await embedding.run_db(embedding.init_db)
+            if embedding.state.model is None:
+                await embedding.run_db(embedding.load_model)
         except Exception as e:
             logger.warning(f"Could not load embedding model: {e}")
     async def generate_ai_profile_suggestions(self, user_id: str, missing_keywords: List[str], job_description: str = None) -> List[str]:
         try:
-            user_profile_context = ""
+            profile_chunks = []
             try:
                 from modules import embedding
-                profile_chunks = embedding.retrieve_chunks(
+                profile_chunks = await embedding.retrieve_chunks_async(
                     user_id=user_id,
                     query_text=" ".join(missing_keywords),
                     top_k=5,
                     namespace="profile"
                 )
-                if profile_chunks:
-                    user_profile_context = "\n".join([
-                        f"- {chunk['text']}" for chunk in profile_chunks[:3]
-                    ])
-                else:
-                    user_profile_context = "No existing profile data found."
             except Exception as e:
                 logger.warning(f"Could not retrieve profile context: {e}")
-                user_profile_context = "Profile data unavailable."
-            prompt = f"""You are an expert career consultant helping a user improve their professional profile. Based on the ATS analysis, the user is missing these key skills/technologies: {', '.join(missing_keywords)}.
-User's Current Profile Context:
-{user_profile_context}
-{f"Target Job Requirements: {job_description}" if job_description else ""}
-Generate specific, actionable suggestions for improving their professional profile to include the missing skills. Focus on:
-1. Skill Development (courses, certifications, training)
-2. Experience Building (hands-on practice, projects)
-3. Profile Content (achievements, experiences to add)
-4. Industry Alignment (positioning for target role)
-Return your response as a JSON array of strings, where each string is a complete, actionable suggestion. Include 5-7 suggestions that are personalized and specific.
-Example format:
-[
-  "Take a Docker certification course to demonstrate containerization skills and add it to your professional development section",
-  "Build a personal project using Kubernetes and deploy it to showcase orchestration experience in your portfolio"
-]
-Focus on PROFILE improvements, not resume edits. Be specific and actionable."""
+            if config.PROFILE_SUGGESTION_MODE == "cached":
+                suggestions = await scoring.get_generic_suggestions(missing_keywords, self.http_client, kind="profile")
+                if not suggestions:
+                    return list(DEFAULT_PROFILE_SUGGESTIONS)
+                return await scoring.personalize_suggestions(suggestions, profile_chunks or [])
+            prompt = await prompt_budget.build_prompt(
+                PROFILE_SUGGESTION_TEMPLATE, "profile_suggestions", job_description=job_description or "",
+                chunks=[schemas.ChunkItem(**chunk) for chunk in profile_chunks[:3]],
+                format_chunks=format_profile_context, missing_keywords=", ".join(missing_keywords)
+            )
             from llm_client import invoke_gemini
             response = await invoke_gemini(self.http_client, prompt, enforce_json=True)
             import json
@@ -637,13 +649,7 @@ Focus on PROFILE improvements, not resume edits. Be specific and actionable."""
                 return suggestions_list
             else:
                 logger.error(f"AI returned invalid format: {response}")
-                return [
-                    "Take courses or get certifications in the missing technologies to strengthen your profile",
-                    "Build personal projects using the missing skills and add them to your experience",
-                    "Update your profile with specific achievements involving these technologies",
-                    "Consider freelance work or volunteering to gain experience with these tools",
-                    "Join professional communities and contribute to open-source projects in these areas"
-                ]
+                return list(DEFAULT_PROFILE_SUGGESTIONS)
         except Exception as e:
             logger.error(f"Error generating AI profile suggestions: {e}")
             return [
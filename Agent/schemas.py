@@ -17,6 +17,12 @@ class IndexSectionResponse(BaseModel):
 class IndexProfileResponse(BaseModel):
     status: str
     message: str
+    total_chunks: Optional[int] = None
+    kept: Optional[int] = None
+    added: Optional[int] = None
+    updated: Optional[int] = None
+    removed: Optional[int] = None
+    timings_ms: Optional[Dict[str, float]] = None
 
 class DeleteSectionResponse(BaseModel):
     status: str
@@ -49,15 +55,38 @@ class GenerateResponse(BaseModel):
     retrieval_mode: str
     section_id: Optional[str] = None
 
+KeywordExtractor = Literal['llm', 'local']
+
 class ScoreRequest(BaseModel):
     job_description: str = Field(..., min_length=1)
     resume_text: str = Field(..., min_length=1)
+    keyword_extractor: Optional[KeywordExtractor] = Field(None, description="Override KEYWORD_EXTRACTOR for this request.")
 
 class ScoreResponse(BaseModel):
     final_score: float = Field(..., description="The final weighted ATS score from 0 to 1.", ge=0.0, le=1.0)
     semantic_score: float = Field(..., description="The semantic similarity score component (0 to 1).", ge=0.0, le=1.0)
     keyword_score: float = Field(..., description="The keyword matching score component (0 to 1).", ge=0.0, le=1.0)
     missing_keywords: List[str] = Field(..., description="Important keywords from the job description missing from the resume.")
+    debug: Optional[Dict[str, float]] = Field(None, description="Stage timings in milliseconds (semantic, keywords, match, total).")
+
+class BatchScoreRequest(BaseModel):
+    job_descriptions: List[str] = Field(..., min_length=1, description="One JD to rank many resumes, or many JDs to match one resume.")
+    resume_texts: List[str] = Field(..., min_length=1)
+    keyword_extractor: Optional[KeywordExtractor] = Field(None, description="Override KEYWORD_EXTRACTOR for this request.")
+
+    @model_validator(mode="after")
+    def check_shape(self):
+        if len(self.job_descriptions) > 1 and len(self.resume_texts) > 1:
+            raise ValueError("Provide either one job description with many resumes or one resume with many job descriptions.")
+        if len(self.job_descriptions) * len(self.resume_texts) > config.BATCH_SCORE_MAX_PAIRS:
+            raise ValueError(f"A batch may contain at most {config.BATCH_SCORE_MAX_PAIRS} pairs.")
+        if not all(text.strip() for text in self.job_descriptions + self.resume_texts):
+            raise ValueError("Job descriptions and resume texts must not be empty.")
+        return self
+
+class BatchScoreResult(ScoreResponse):
+    job_index: int
+    resume_index: int
 
 class SuggestionRequest(BaseModel):
     missing_keywords: List[str] = Field(..., min_length=1)
@@ -69,6 +98,11 @@ class HealthResponse(BaseModel):
     status: str
     service: str
 
+class ReadinessResponse(BaseModel):
+    status: str
+    startup_ms: Dict[str, float] = Field(default_factory=dict)
+    error: Optional[str] = None
+
 class AgentChatRequest(BaseModel):
     user_id: str = Field(..., min_length=1)
     message: str = Field(..., min_length=1)
@@ -0,0 +1,97 @@
+"""Benchmark the compiled keyword matcher against the naive substring scan.
+
+Builds a synthetic keyword list and resume corpus, then reports the matcher compile time,
+per-resume scan time for both approaches and, against the keywords actually written into
+each resume, how many each approach misses (false negatives) or wrongly reports (false
+positives). Inserted phrases overlap on purpose ("AWS Lambda" also contains "AWS").
+
+Usage (from the Agent directory):
+    python scripts/bench_keyword_matcher.py --keywords 1000 --resumes 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.keyword_matcher import ALIAS_GROUPS, KeywordMatcher, canonical_form
+
+FILLER = (
+    "led designed built shipped owned migrated improved reduced latency team customers platform "
+    "service services data pipeline reliability scale across production weekly stakeholders google "
+    "javascript mysql going ongoing aidan email reaction nodes restore"
+).split()
+
+def naive_missing(required, resume_text):
+    resume_lower = resume_text.lower()
+    return [skill for skill in required if skill.lower() not in resume_lower]
+
+def make_keywords(count, rng):
+    keywords = [group[0] for group in ALIAS_GROUPS] + ["Java", "Go", "C", "R", "SQL", "React", "Spark", "Rust",
+                                                       "AWS", "AWS Lambda", "React Native", "SQL Server", "Node.js"]
+    while len(keywords) < count:
+        keywords.append(f"{rng.choice(['Apache', 'Azure', 'Cloud', 'Data', 'Open'])} Tool{len(keywords)}")
+    return keywords[:count]
+
+def make_resume(keywords, words, rng):
+    """``(text, reference)``: the resume and the keywords it really contains."""
+    tokens = [rng.choice(FILLER) for _ in range(words)]
+    inserted = rng.sample(keywords, k=min(len(keywords), 25))
+    for keyword in inserted:
+        tokens.insert(rng.randrange(len(tokens)), keyword)
+    by_form = {}
+    for keyword in keywords:
+        by_form.setdefault(canonical_form(keyword), set()).add(keyword)
+    # Every keyword (or alias) spelled by a run of whole words is present, including runs that
+    # span an inserted phrase and its neighbours ("google" followed by "Cloud Tool7").
+    text_words = " ".join(tokens).split()
+    longest = max(len(form.split()) for form in by_form)
+    reference = {keyword for i in range(len(text_words)) for j in range(i + 1, min(i + longest, len(text_words)) + 1)
+                 for keyword in by_form.get(canonical_form(" ".join(text_words[i:j])), ())}
+    return " ".join(tokens), reference
+
+def errors(missing, keywords, reference):
+    """``(false negatives, false positives)`` of one resume's missing list against the reference."""
+    found = set(keywords) - set(missing)
+    return len(reference - found), len(found - reference)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keywords", type=int, default=1000)
+    parser.add_argument("--resumes", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=600, help="words per synthetic resume")
+    parser.add_argument("--naive-sample", type=int, default=1000, help="resumes scanned with the naive method (extrapolated)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    keywords = make_keywords(args.keywords, rng)
+    corpus = [make_resume(keywords, args.words, rng) for _ in range(args.resumes)]
+    resumes = [text for text, _ in corpus]
+
+    started = time.perf_counter()
+    matcher = KeywordMatcher(keywords)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    compiled = [matcher.missing(resume) for resume in resumes]
+    compiled_s = time.perf_counter() - started
+
+    sample = resumes[:min(args.naive_sample, len(resumes))]
+    started = time.perf_counter()
+    naive = [naive_missing(keywords, resume) for resume in sample]
+    naive_s = (time.perf_counter() - started) * len(resumes) / len(sample)
+
+    compiled_errors = [errors(missing, keywords, reference) for missing, (_, reference) in zip(compiled, corpus)]
+    naive_errors = [errors(missing, keywords, reference) for missing, (_, reference) in zip(naive, corpus)]
+    compiled_fn, compiled_fp = (sum(column) for column in zip(*compiled_errors))
+    naive_fn, naive_fp = (sum(column) for column in zip(*naive_errors))
+    print(f"{len(keywords)} keywords x {len(resumes)} resumes (~{args.words} words each)")
+    print(f"compile: {compile_ms:.1f} ms, pattern {len(matcher.pattern.pattern)} chars")
+    print(f"compiled matcher: {compiled_s:7.2f} s total  {compiled_s / len(resumes) * 1e6:8.1f} us/resume")
+    print(f"naive substring:  {naive_s:7.2f} s total  {naive_s / len(resumes) * 1e6:8.1f} us/resume (extrapolated from {len(sample)})")
+    print(f"compiled matcher errors: {compiled_fn} false negatives, {compiled_fp} false positives over {len(resumes)} resumes")
+    print(f"naive errors on the sample: {naive_fn} false negatives, {naive_fp} false positives (e.g. Java in JavaScript, Go in Google)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the in-process vector index against a local MongoDB or mongomock.
+
+The benchmark writes (and first clears) a "bench_chunks" collection, so it uses an
+in-memory mongomock database unless MONGO_URI is set explicitly.
+
+Usage (from the Agent directory):
+    python scripts/bench_retrieval.py --users 200 --chunks 40
+    MONGO_URI=mongodb://localhost:27017 python scripts/bench_retrieval.py
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Connecting is this script's job, so it picks a database for itself when none is configured.
+os.environ.setdefault("MONGO_URI", "mongomock://localhost")
+
+import numpy as np
+import config
+from modules import embedding
+from modules.vector_index import LocalVectorIndex
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values), q))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=40, help="chunks per user")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=7)
+    args = parser.parse_args()
+
+    embedding.init_db()
+    collection = embedding.state.db["bench_chunks"]
+    collection.delete_many({})
+    rng = np.random.default_rng(0)
+    user_ids = [f"bench-user-{i}" for i in range(args.users)]
+    for user_id in user_ids:
+        vectors = rng.standard_normal((args.chunks, config.EMBEDDING_DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        collection.insert_many([{
+            "_id": str(uuid.uuid4()), "user_id": user_id, "index_namespace": "profile",
+            "source_type": "experience", "source_id": f"{i}_0", "text": f"chunk {i}",
+            "embedding": vector.tolist(),
+        } for i, vector in enumerate(vectors)])
+
+    index = LocalVectorIndex(max_users=args.users)
+    cold, warm = [], []
+    for i in range(args.queries):
+        user_id = user_ids[i % args.users]
+        query = rng.standard_normal(config.EMBEDDING_DIM).astype(np.float32)
+        query /= np.linalg.norm(query)
+        started = time.perf_counter()
+        index.search(collection, user_id, "profile", query, args.top_k, version=1)
+        (cold if i < args.users else warm).append((time.perf_counter() - started) * 1000)
+
+    print(f"users={args.users} chunks/user={args.chunks} top_k={args.top_k}")
+    print(f"cold (load + search): p50={percentile(cold, 50):.3f} ms  p99={percentile(cold, 99):.3f} ms")
+    if warm:
+        print(f"warm (search only):   p50={percentile(warm, 50):.3f} ms  p99={percentile(warm, 99):.3f} ms")
+    print(index.stats())
+    collection.drop()
+
+if __name__ == "__main__":
+    main()
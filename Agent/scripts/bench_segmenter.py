@@ -0,0 +1,60 @@
+"""Compare the rule-based and NLTK punkt segmenters on a profile corpus.
+
+Reports chunking throughput per segmenter and how often both produce the same chunks.
+The NLTK run needs the 'punkt_tab' data to be installed already.
+
+Usage (from the Agent directory):
+    python scripts/bench_segmenter.py --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import embedding, segmentation
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "profiles.json")
+
+def chunk_fields(segmenter, fields):
+    return [list(segmentation.chunk_sentences(segmenter.split(text), 150)) for _, _, text in fields]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSON list of profile documents")
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        profiles = json.load(f)
+    fields = [field for profile in profiles for field in embedding._extract_profile_fields(profile)]
+    print(f"{len(profiles)} profiles, {len(fields)} fields, {args.repeat} passes")
+
+    results = {}
+    for name in ("rule", "nltk"):
+        segmenter = segmentation.create_segmenter(name)
+        try:
+            segmenter.prepare()
+            results[name] = chunk_fields(segmenter, fields)
+        except LookupError as e:
+            print(f"{name:>5}: skipped ({e.__class__.__name__}: punkt data unavailable)")
+            continue
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            chunk_fields(segmenter, fields)
+        elapsed = time.perf_counter() - started
+        chunks = sum(len(field_chunks) for field_chunks in results[name])
+        tokens = sum(chunk.token_count for field_chunks in results[name] for chunk in field_chunks)
+        print(f"{name:>5}: {elapsed / (args.repeat * len(profiles)) * 1e6:8.1f} us/profile  "
+              f"{args.repeat * len(fields) / elapsed:10.0f} fields/s  chunks={chunks} est_tokens={tokens}")
+
+    if len(results) == 2:
+        same = sum(
+            [chunk.text for chunk in rule] == [chunk.text for chunk in punkt]
+            for rule, punkt in zip(results["rule"], results["nltk"])
+        )
+        print(f"identical chunking on {same}/{len(fields)} fields")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measure how well the local keyword extractor agrees with cached LLM extractions.
+
+Reads (job description, skills) pairs from the persistent keyword cache in MongoDB
+(KEYWORD_CACHE_PERSISTENT=true stores them) or from a JSONL file with
+"job_description" and "skills" fields. A skill counts as shared when the alias-aware
+keyword matcher finds it in the other list.
+
+Usage (from the Agent directory):
+    python scripts/check_keyword_agreement.py --limit 500
+    python scripts/check_keyword_agreement.py --file extractions.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import config
+from modules import embedding
+from modules.keyword_extraction import get_extractor
+from modules.keyword_matcher import compile_matcher
+
+def load_pairs(args):
+    if args.file:
+        with open(args.file) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        embedding.init_db()
+        rows = embedding.state.db[config.KEYWORD_CACHE_COLLECTION].find(
+            {"job_description": {"$exists": True}}, {"job_description": 1, "skills": 1}
+        ).limit(args.limit)
+    return [(row["job_description"], row["skills"]) for row in rows if row.get("skills")]
+
+def shared(source, target):
+    """How many of ``source`` occur (with aliases) in ``target``."""
+    if not source or not target:
+        return 0
+    matcher = compile_matcher(tuple(source))
+    return len(matcher.found(" ; ".join(target)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="JSONL of {job_description, skills}; defaults to the MongoDB keyword cache")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--show", type=int, default=5, help="print the N lowest-F1 job descriptions")
+    args = parser.parse_args()
+
+    pairs = load_pairs(args)
+    if not pairs:
+        print("No cached LLM extractions found.")
+        return
+    extractor = get_extractor()
+    precision, recall, f1, durations, rows = [], [], [], [], []
+    for job_description, llm_skills in pairs:
+        started = time.perf_counter()
+        local_skills = extractor.extract(job_description)
+        durations.append((time.perf_counter() - started) * 1000)
+        p = shared(local_skills, llm_skills) / len(local_skills) if local_skills else 0.0
+        r = shared(llm_skills, local_skills) / len(llm_skills)
+        score = 2 * p * r / (p + r) if p + r else 0.0
+        precision.append(p)
+        recall.append(r)
+        f1.append(score)
+        rows.append((score, job_description, llm_skills, local_skills))
+
+    print(f"{len(pairs)} job descriptions")
+    print(f"precision={np.mean(precision):.3f}  recall={np.mean(recall):.3f}  f1={np.mean(f1):.3f}")
+    print(f"local extraction: p50={np.percentile(durations, 50):.2f} ms  p99={np.percentile(durations, 99):.2f} ms")
+    for score, job_description, llm_skills, local_skills in sorted(rows, key=lambda row: row[0])[:args.show]:
+        print(f"\nf1={score:.2f}  {' '.join(job_description.split())[:100]}...")
+        print(f"  llm:   {llm_skills}")
+        print(f"  local: {local_skills}")
+
+if __name__ == "__main__":
+    main()
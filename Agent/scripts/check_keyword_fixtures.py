@@ -0,0 +1,43 @@
+"""Check that the local keyword extractor finds the skills each bundled fixture JD names.
+
+Every job description in fixtures/job_descriptions.json has a list of skills it must
+yield (compared alias-aware, so "Spark" satisfies "Apache Spark"). Exits non-zero
+when any is missing.
+
+Usage (from the Agent directory):
+    python scripts/check_keyword_fixtures.py
+"""
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.keyword_extraction import get_extractor
+from modules.keyword_matcher import compile_matcher
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "job_descriptions.json")
+
+# Fixture index -> skills the extractor must return for it.
+EXPECTED = {
+    0: ["Python", "Go", "PostgreSQL", "Kafka", "Kubernetes", "Terraform", "AWS", "Redis"],
+    1: ["PyTorch", "scikit-learn", "NLP", "FastAPI", "Apache Airflow", "Apache Spark", "GCP"],
+    2: ["React", "TypeScript", "Next.js", "GraphQL", "Jest", "Cypress", "GitHub Actions"],
+    3: ["Linux", "Docker", "Kubernetes", "Terraform", "Ansible", "Prometheus", "Grafana"],
+    4: ["SQL", "Python", "Pandas", "Tableau", "Power BI", "Snowflake", "BigQuery"],
+}
+
+def main():
+    with open(FIXTURES) as f:
+        job_descriptions = json.load(f)
+    extractor = get_extractor()
+    failures = 0
+    for index, expected in EXPECTED.items():
+        extracted = extractor.extract(job_descriptions[index])
+        missing = compile_matcher(tuple(expected)).missing(" ; ".join(extracted))
+        status = "ok" if not missing else f"missing {missing}"
+        print(f"fixture {index}: {status}  {extracted}")
+        failures += bool(missing)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Exercise the Gemini client's retry, rate limiting, circuit breaker and request coalescing
+against a local mock server.
+
+The mock server answers generateContent with scripted failures (429 with Retry-After,
+503) before succeeding, so the client's counters can be checked without network access.
+
+Usage (from the Agent directory):
+    python scripts/check_llm_resilience.py
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key")
+
+import httpx
+import config
+import llm_client
+
+class MockGemini(BaseHTTPRequestHandler):
+    script = []  # statuses to return before succeeding; "fail" makes every request return 503
+    lock = threading.Lock()
+    requests = 0
+    delay = 0.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.delay)
+        with self.lock:
+            MockGemini.requests += 1
+            status = self.script.pop(0) if self.script and self.script[0] != "fail" else (503 if self.script else 200)
+        if status == 200:
+            body = json.dumps({"candidates": [{"content": {"parts": [{"text": '{"ok": true}'}]}}]}).encode()
+        else:
+            body = json.dumps({"error": {"code": status, "message": "mock failure"}}).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0.05")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+async def scenario(name, script, calls, concurrency=1, same_prompt=False):
+    MockGemini.script = list(script)
+    MockGemini.requests = 0
+    llm_client.reset_guard()
+    started = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                try:
+                    await llm_client.invoke_gemini(client, "ping" if same_prompt else f"ping {i}")
+                    return "ok"
+                except llm_client.LLMCircuitOpenError:
+                    return "circuit_open"
+                except llm_client.LLMError:
+                    return "error"
+
+        outcomes = await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+    summary = {outcome: outcomes.count(outcome) for outcome in set(outcomes)}
+    print(f"\n== {name}: {summary} in {elapsed:.2f}s, server saw {MockGemini.requests} requests")
+    print(await llm_client.get_stats())
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGemini)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config.GEMINI_API_BASE_URL = f"http://127.0.0.1:{server.server_port}/v1beta"
+    config.LLM_RETRY_BASE_DELAY = 0.05
+    config.LLM_CIRCUIT_RESET_SECONDS = 0.5
+
+    asyncio.run(scenario("429 twice, then success (Retry-After honoured)", [429, 429], calls=1))
+    asyncio.run(scenario("503 then success", [503], calls=1))
+    config.LLM_RATE_LIMIT_RPM, config.LLM_RATE_LIMIT_BURST = 600, 2
+    asyncio.run(scenario("rate limited to 10 rps, burst 2", [], calls=12, concurrency=12))
+    config.LLM_RATE_LIMIT_RPM = 0
+    asyncio.run(scenario("sustained 503s trip the breaker", ["fail"], calls=20, concurrency=4))
+    MockGemini.delay = 0.2
+    asyncio.run(scenario("identical prompts coalesced", [], calls=20, concurrency=20, same_prompt=True))
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
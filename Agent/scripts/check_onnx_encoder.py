@@ -0,0 +1,74 @@
+"""Offline parity check and throughput benchmark: ONNX encoder vs the torch model.
+
+Usage (from the Agent directory):
+    python scripts/check_onnx_encoder.py --min-cosine 0.98
+
+Encodes the fixture corpus with both backends, reports per-text cosine agreement and
+nearest-neighbour agreement, then measures embeddings/sec for each. Exits non-zero if
+any text falls below --min-cosine.
+"""
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+import config
+from modules.onnx_encoder import OnnxEncoder
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "embedding_corpus.txt")
+
+def throughput(encode, texts, batch_size, rounds):
+    encode(texts[:batch_size])
+    started = time.perf_counter()
+    for _ in range(rounds):
+        encode(texts)
+    return rounds * len(texts) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--model-dir", default=config.ONNX_MODEL_DIR)
+    parser.add_argument("--model-file", default=config.ONNX_MODEL_FILE)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--batch-size", type=int, default=config.EMBED_BATCH_MAX_SIZE)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=config.ONNX_INTRA_OP_THREADS)
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        texts = [line.strip() for line in f if line.strip()]
+    torch_model = SentenceTransformer(config.MODEL_NAME, device="cpu")
+    onnx_model = OnnxEncoder(args.model_dir, args.model_file, args.threads)
+
+    def encode_torch(batch):
+        return torch_model.encode(batch, batch_size=args.batch_size, convert_to_numpy=True, normalize_embeddings=True)
+
+    def encode_onnx(batch):
+        return onnx_model.encode(batch, batch_size=args.batch_size)
+
+    reference, candidate = encode_torch(texts), encode_onnx(texts)
+    cosines = np.sum(reference * candidate, axis=1)
+    reference_sims, candidate_sims = reference @ reference.T, candidate @ candidate.T
+    np.fill_diagonal(reference_sims, -np.inf)
+    np.fill_diagonal(candidate_sims, -np.inf)
+    neighbour_agreement = np.mean(reference_sims.argmax(axis=1) == candidate_sims.argmax(axis=1))
+    print(f"corpus: {len(texts)} texts from {args.corpus}")
+    print(f"cosine vs torch: min={cosines.min():.4f} p1={np.percentile(cosines, 1):.4f} mean={cosines.mean():.4f}")
+    print(f"nearest-neighbour agreement: {neighbour_agreement:.1%}")
+
+    bench_texts = (texts * (1 + 512 // len(texts)))[:512]
+    torch_rate = throughput(encode_torch, bench_texts, args.batch_size, args.rounds)
+    onnx_rate = throughput(encode_onnx, bench_texts, args.batch_size, args.rounds)
+    print(f"throughput: torch={torch_rate:.0f}/s onnx={onnx_rate:.0f}/s speedup={onnx_rate / torch_rate:.2f}x")
+
+    worst = int(cosines.argmin())
+    if cosines[worst] < args.min_cosine:
+        print(f"FAIL: cosine {cosines[worst]:.4f} < {args.min_cosine} for: {texts[worst][:80]}")
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == "__main__":
+    main()
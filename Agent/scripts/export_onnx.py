@@ -0,0 +1,71 @@
+"""Export the embedding model to ONNX and quantize it to dynamic int8.
+
+Usage (from the Agent directory):
+    pip install onnx onnxruntime
+    python scripts/export_onnx.py --output onnx_model
+
+Writes model.onnx (fp32), model_int8.onnx, the tokenizer files and encoder_config.json,
+which is everything EMBEDDING_BACKEND=onnx needs. Validate the result with
+scripts/check_onnx_encoder.py before deploying it.
+"""
+import argparse
+import json
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from sentence_transformers import SentenceTransformer
+import config
+from modules.onnx_encoder import ENCODER_CONFIG_FILE
+
+class _HiddenStates(torch.nn.Module):
+    def __init__(self, transformer, input_names):
+        super().__init__()
+        self.transformer = transformer
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.transformer(**dict(zip(self.input_names, inputs))).last_hidden_state
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=config.MODEL_NAME)
+    parser.add_argument("--output", default=config.ONNX_MODEL_DIR)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model, device="cpu")
+    pooling_mode = model[1].get_pooling_mode_str()
+    if pooling_mode != "mean":
+        sys.exit(f"Only mean pooling is supported by OnnxEncoder, model uses '{pooling_mode}'.")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    os.makedirs(args.output, exist_ok=True)
+
+    sample = tokenizer(["Senior Python developer with Kubernetes experience."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    fp32_path = os.path.join(args.output, "model.onnx")
+    int8_path = os.path.join(args.output, "model_int8.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(transformer, input_names), tuple(sample[name] for name in input_names), fp32_path,
+            input_names=input_names, output_names=["last_hidden_state"], dynamic_axes=dynamic_axes,
+            opset_version=args.opset, do_constant_folding=True,
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(args.output)
+    with open(os.path.join(args.output, ENCODER_CONFIG_FILE), "w") as f:
+        json.dump({
+            "model_name": args.model,
+            "max_seq_length": model.max_seq_length,
+            "dim": model.get_sentence_embedding_dimension(),
+            "pooling": pooling_mode,
+        }, f, indent=2)
+    for path in (fp32_path, int8_path):
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Gemini-compatible stand-in server for load tests: replays recorded responses with synthetic latency and errors.
+
+Requests are keyed by a hash of the prompt (contents, system instruction, tool declarations)
+and the generation config. In ``record`` mode every request is forwarded to the real API and
+the response appended to a JSONL recording; in ``replay`` mode recorded responses are served
+and misses get a synthetic answer shaped for the prompt (or a 404 with --on-miss error).
+
+Point the service at it with GEMINI_API_BASE_URL, which both invoke_gemini and the agent's
+GeminiChatModel use:
+
+Usage (from the Agent directory):
+    python scripts/gemini_standin.py --mode record --recordings recordings.jsonl   # needs GEMINI_API_KEY
+    python scripts/gemini_standin.py --recordings recordings.jsonl --latency lognormal:800,0.5 --error-rate 0.02
+    GEMINI_API_BASE_URL=http://127.0.0.1:8090/v1beta uvicorn app:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+from collections import Counter
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+UPSTREAM_URL = "https://generativelanguage.googleapis.com/v1beta"
+# Fields that identify a request; the API key and transport details are not part of the key.
+KEY_FIELDS = ("contents", "systemInstruction", "tools", "generationConfig")
+
+def request_key(model: str, body: dict) -> str:
+    canonical = json.dumps({"model": model, **{field: body.get(field) for field in KEY_FIELDS}}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def parse_latency(spec: str):
+    """``fixed:MS``, ``uniform:LO,HI`` or ``lognormal:MEDIAN_MS,SIGMA`` -> sampler returning seconds."""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",")] if params else []
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(0, sigma) * median / 1000
+    raise ValueError(f"Unknown latency distribution '{spec}'. Use fixed:MS, uniform:LO,HI or lognormal:MEDIAN_MS,SIGMA.")
+
+# Agent tool picked for a synthetic function call, by a word in the user's message (first match wins).
+TOOL_TRIGGERS = (("score", "calculate_ats_score"), ("suggest", "get_resume_suggestions"),
+                 ("edit", "edit_resume_section"), ("resume", "generate_resume"))
+
+def _prompt_text(body: dict) -> str:
+    return "\n".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+
+def synthetic_text(body: dict) -> str:
+    """A response shaped like what the calling prompt expects, for replay misses."""
+    prompt = _prompt_text(body)
+    if '"resume"' in prompt:
+        return json.dumps({"resume": {
+            "basics": {"name": "Stand-in Candidate", "label": "Software Engineer", "summary": "Synthetic resume from the Gemini stand-in."},
+            "experience": [{"company": "Example Corp", "position": "Engineer", "startDate": "2020-01-01", "endDate": "present",
+                            "summary": "Built services.", "highlights": ["Shipped features"]}],
+            "education": [],
+            "skills": {"keywords": ["Python", "FastAPI"]},
+        }})
+    if '"suggestions"' in prompt:
+        return json.dumps({"suggestions": [f"Describe a project where you used {skill}." for skill in ("Docker", "Kubernetes", "AWS")]})
+    if '"skills"' in prompt:
+        return json.dumps({"skills": ["Python", "FastAPI", "MongoDB", "Docker", "Kubernetes", "AWS", "CI/CD", "REST API"]})
+    if "JSON array of strings" in prompt:
+        return json.dumps(["Add a certification to your profile.", "Describe a recent project in more detail."])
+    return "Done. Let me know what you would like to do next."
+
+def synthetic_tool_call(body: dict):
+    """For an agent turn that has not called a tool yet, a functionCall chosen from the user's message."""
+    contents = body.get("contents", [])
+    if any("functionResponse" in part for content in contents for part in content.get("parts", [])):
+        return None
+    declared = {declaration["name"] for tool in body.get("tools", []) for declaration in tool.get("functionDeclarations", [])}
+    prompt = _prompt_text(body)
+    message = prompt.rpartition("User Message:")[2].lower()
+    for trigger, name in TOOL_TRIGGERS:
+        if trigger in message and name in declared:
+            fields = {"user_id": "User ID:", "job_description": "Job Description:"}
+            args = {field: prompt.partition(label)[2].split("\n", 1)[0].strip() for field, label in fields.items() if label in prompt}
+            if name == "edit_resume_section":
+                args["edit_instructions"] = message.strip()
+            return {"functionCall": {"name": name, "args": args}}
+    return None
+
+def generate_response(text: str, parts=None) -> dict:
+    return {
+        "candidates": [{"content": {"role": "model", "parts": parts or [{"text": text}]}, "finishReason": "STOP"}],
+        "usageMetadata": {"candidatesTokenCount": len(text) // 4},
+    }
+
+def create_app(args) -> FastAPI:
+    app = FastAPI(title="Gemini stand-in")
+    recordings = {}
+    if os.path.exists(args.recordings):
+        with open(args.recordings) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    recordings[row["key"]] = row["response"]
+    sample_latency = parse_latency(args.latency)
+    error_statuses = [int(status) for status in args.error_statuses.split(",")]
+    stats = Counter()
+    lock = asyncio.Lock()
+    upstream = httpx.AsyncClient(timeout=120.0)
+
+    async def respond(model: str, body: dict) -> tuple:
+        """(status, response JSON); replayed answers come after the configured latency/error injection."""
+        stats["requests"] += 1
+        key = request_key(model, body)
+        if args.mode == "record":
+            upstream_response = await upstream.post(
+                f"{args.upstream}/models/{model}:generateContent", params={"key": os.environ["GEMINI_API_KEY"]}, json=body
+            )
+            if upstream_response.status_code == 200:
+                async with lock:
+                    if key not in recordings:
+                        recordings[key] = upstream_response.json()
+                        with open(args.recordings, "a") as f:
+                            f.write(json.dumps({"key": key, "model": model, "response": recordings[key]}) + "\n")
+                        stats["recorded"] += 1
+            return upstream_response.status_code, upstream_response.json()
+        await asyncio.sleep(sample_latency())
+        if random.random() < args.error_rate:
+            status = random.choice(error_statuses)
+            stats[f"injected_{status}"] += 1
+            return status, {"error": {"code": status, "message": "Injected by the Gemini stand-in", "status": "UNAVAILABLE"}}
+        if key in recordings:
+            stats["hits"] += 1
+            return 200, recordings[key]
+        stats["misses"] += 1
+        if args.on_miss == "error":
+            return 404, {"error": {"code": 404, "message": f"No recording for request {key}", "status": "NOT_FOUND"}}
+        tool_call = synthetic_tool_call(body) if body.get("tools") else None
+        if tool_call is not None:
+            return 200, generate_response("", [tool_call])
+        return 200, generate_response(synthetic_text(body))
+
+    @app.post("/v1beta/models/{model_action}")
+    async def models(model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        body = await request.json()
+        status, payload = await respond(model, body)
+        if action == "streamGenerateContent" and status == 200:
+            parts = payload["candidates"][0]["content"]["parts"]
+            text = "".join(part.get("text", "") for part in parts)
+
+            async def events():
+                size = max(1, len(text) // args.stream_chunks)
+                for start in range(0, len(text), size):
+                    yield f"data: {json.dumps(generate_response(text[start:start + size]))}\r\n\r\n"
+                    await asyncio.sleep(args.stream_interval_ms / 1000)
+            return StreamingResponse(events(), media_type="text/event-stream")
+        return JSONResponse(payload, status_code=status)
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "recordings": len(recordings)}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--recordings", default="gemini_recordings.jsonl")
+    parser.add_argument("--upstream", default=UPSTREAM_URL, help="real Gemini base URL used in record mode")
+    parser.add_argument("--on-miss", choices=["synthetic", "error"], default="synthetic")
+    parser.add_argument("--latency", default="fixed:0", help="fixed:MS, uniform:LO,HI or lognormal:MEDIAN_MS,SIGMA")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with an injected error")
+    parser.add_argument("--error-statuses", default="429,503", help="statuses injected errors are drawn from")
+    parser.add_argument("--stream-chunks", type=int, default=20, help="SSE events per streamed response")
+    parser.add_argument("--stream-interval-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    if args.mode == "record" and not os.environ.get("GEMINI_API_KEY"):
+        parser.error("record mode forwards to the real API and needs GEMINI_API_KEY")
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
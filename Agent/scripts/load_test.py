@@ -0,0 +1,159 @@
+"""Closed-loop load test for /score, /generate/full and /agent/chat.
+
+Each of --concurrency workers sends requests back to back for --duration seconds (after
+--warmup seconds whose results are discarded), then throughput, latency percentiles and
+status counts are reported per endpoint. Run the service against scripts/gemini_standin.py
+so results do not depend on Gemini latency or quota.
+
+/generate/full and /agent/chat need indexed profiles: the fixture users in
+scripts/fixtures/profiles.json are loaded into MongoDB and indexed first unless --skip-setup
+is given (use the same MONGO_URI as the service).
+
+Usage (from the Agent directory):
+    python scripts/gemini_standin.py --latency lognormal:600,0.4 &
+    GEMINI_API_BASE_URL=http://127.0.0.1:8090/v1beta uvicorn app:app &
+    python scripts/load_test.py --endpoints score,generate,chat --concurrency 16 --duration 30
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+
+import httpx
+import numpy as np
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CHAT_MESSAGES = ("Generate a resume for this job", "What is my ATS score?", "Any suggestions to improve my profile?")
+
+def load_fixtures():
+    with open(os.path.join(FIXTURES, "profiles.json")) as f:
+        profiles = json.load(f)
+    with open(os.path.join(FIXTURES, "job_descriptions.json")) as f:
+        job_descriptions = json.load(f)
+    return profiles, job_descriptions
+
+def resume_text(profile: dict) -> str:
+    lines = [profile.get("headline", ""), profile.get("summary", ""), "Skills: " + ", ".join(profile.get("skills", []))]
+    lines += [f"{job['position']} at {job['company']}: {job['description']}" for job in profile.get("experience", [])]
+    return "\n".join(line for line in lines if line)
+
+def request_factory(endpoint: str, profiles, job_descriptions):
+    pairs = itertools.cycle([(profile, jd) for jd in job_descriptions for profile in profiles])
+    conversation_ids = {}
+
+    def score(worker: int):
+        profile, jd = next(pairs)
+        return "/score", {"job_description": jd, "resume_text": resume_text(profile)}
+
+    def generate(worker: int):
+        profile, jd = next(pairs)
+        return "/generate/full", {"user_id": profile["user_id"], "job_description": jd}
+
+    def chat(worker: int):
+        profile, jd = next(pairs)
+        # One conversation per worker and user keeps agent state bounded over a long run.
+        conversation_id = conversation_ids.setdefault((worker, profile["user_id"]), str(uuid.uuid4()))
+        message = CHAT_MESSAGES[hash(conversation_id) % len(CHAT_MESSAGES)]
+        return "/agent/chat", {"user_id": profile["user_id"], "message": message, "job_description": jd, "conversation_id": conversation_id}
+
+    return {"score": score, "generate": generate, "chat": chat}[endpoint]
+
+async def setup_profiles(base_url: str, profiles):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import config
+    from pymongo import MongoClient
+    collection = MongoClient(config.MONGO_URI)[config.MONGO_DB_NAME]["profiles"]
+    for profile in profiles:
+        collection.replace_one({"user_id": profile["user_id"]}, profile, upsert=True)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300.0) as client:
+        for profile in profiles:
+            response = await client.post(f"/index/profile/{profile['user_id']}")
+            response.raise_for_status()
+    print(f"Indexed {len(profiles)} fixture profiles.")
+
+async def run_endpoint(args, endpoint: str, profiles, job_descriptions) -> dict:
+    make_request = request_factory(endpoint, profiles, job_descriptions)
+    latencies, statuses = [], Counter()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    started = time.perf_counter()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        async def worker(worker_id: int):
+            while time.perf_counter() < stop_at:
+                path, body = make_request(worker_id)
+                sent = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                finished = time.perf_counter()
+                if sent >= measure_from:
+                    latencies.append(finished - sent)
+                    statuses[status] += 1
+
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - measure_from
+    ok = statuses.get("200", 0)
+    summary = {}
+    if latencies:
+        latency_ms = np.asarray(latencies) * 1000
+        summary = {f"p{q}": round(float(np.percentile(latency_ms, q)), 1) for q in (50, 90, 95, 99)}
+        summary.update(mean=round(float(latency_ms.mean()), 1), max=round(float(latency_ms.max()), 1))
+    return {
+        "endpoint": endpoint,
+        "concurrency": args.concurrency,
+        "requests": len(latencies),
+        "throughput_rps": round(ok / elapsed, 2),
+        "error_rate": round(1 - ok / len(latencies), 4) if latencies else 0.0,
+        "latency_ms": summary,
+        "statuses": dict(statuses),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoints", default="score,generate,chat", help="comma-separated: score, generate, chat")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before measuring starts")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--skip-setup", action="store_true", help="do not load and index the fixture profiles")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    profiles, job_descriptions = load_fixtures()
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    if not args.skip_setup and {"generate", "chat"} & set(endpoints):
+        await setup_profiles(args.base_url, profiles)
+    async with httpx.AsyncClient(base_url=args.base_url) as client:
+        metrics_before = (await client.get("/metrics")).json()
+
+    results = []
+    for endpoint in endpoints:
+        result = await run_endpoint(args, endpoint, profiles, job_descriptions)
+        results.append(result)
+        latency = result["latency_ms"]
+        print(f"{endpoint:>8}: {result['requests']} requests, {result['throughput_rps']} req/s, "
+              f"p50 {latency.get('p50')} ms, p95 {latency.get('p95')} ms, p99 {latency.get('p99')} ms, "
+              f"errors {result['error_rate']:.2%} {result['statuses']}")
+
+    async with httpx.AsyncClient(base_url=args.base_url) as client:
+        llm_after = (await client.get("/metrics")).json().get("llm", {})
+    llm_before = metrics_before.get("llm", {})
+    upstream = {key: llm_after[key] - llm_before.get(key, 0) for key in ("requests", "attempts", "retries", "coalesced")
+                if isinstance(llm_after.get(key), (int, float))}
+    print(f"Gemini calls during the run: {upstream}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "llm": upstream}, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Rewrite stored chunk embeddings into another storage format.
+
+Usage (from the Agent directory):
+    python scripts/migrate_embeddings.py --format float16 [--dry-run] [--batch-size 500]
+
+Formats: array (BSON list of doubles), float32 / int8 (BSON vector binData, Atlas
+indexable) and float16 (compact binData, local retrieval backend only). Set
+EMBEDDING_STORAGE_FORMAT to the same value so new chunks are written in that format.
+"""
+import argparse
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+from pymongo import UpdateOne
+from modules import embedding, vector_codec
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", required=True, choices=vector_codec.STORAGE_FORMATS)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report the size change without writing")
+    args = parser.parse_args()
+
+    embedding.init_db()
+    collection = embedding.get_chunks_collection()
+    cursor = collection.find(
+        {"embedding": {"$exists": True}}, {"_id": 1, "embedding": 1, "embedding_scale": 1}, batch_size=args.batch_size
+    )
+    scanned = converted = bytes_before = bytes_after = 0
+    operations = []
+    for doc in cursor:
+        scanned += 1
+        if vector_codec.storage_format_of(doc["embedding"]) == args.format:
+            continue
+        vector = vector_codec.decode_embedding(doc["embedding"], doc.get("embedding_scale"))
+        fields = vector_codec.encode_embedding(vector, args.format)
+        bytes_before += len(bson.encode({k: doc[k] for k in ("embedding", "embedding_scale") if k in doc}))
+        bytes_after += len(bson.encode(fields))
+        update = {"$set": fields}
+        if "embedding_scale" not in fields:
+            update["$unset"] = {"embedding_scale": ""}
+        operations.append(UpdateOne({"_id": doc["_id"]}, update))
+        converted += 1
+        if len(operations) >= args.batch_size:
+            if not args.dry_run:
+                collection.bulk_write(operations, ordered=False)
+            operations = []
+            print(f"converted {converted}/{scanned} chunks...", flush=True)
+    if operations and not args.dry_run:
+        collection.bulk_write(operations, ordered=False)
+    ratio = bytes_before / bytes_after if bytes_after else 0.0
+    action = "would convert" if args.dry_run else "converted"
+    print(f"{action} {converted} of {scanned} chunks to {args.format}: "
+          f"embedding bytes {bytes_before} -> {bytes_after} ({ratio:.1f}x smaller)")
+    embedding.shutdown()
+
+if __name__ == "__main__":
+    main()